@@ -5,16 +5,32 @@ import pyqtgraph as pg
 from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QVBoxLayout, QWidget, QMenu, QInputDialog, QMessageBox
 from PyQt5.QtCore import  Qt, QTimer, QObject, pyqtSignal, QRect
 from PyQt5.QtGui import QPainter, QColor
-import pandas as pd
 from pyqtgraph import PlotWidget
+import logging
 import math
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
 from datetime import datetime
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Spacer, Paragraph
-from reportlab.platypus.flowables import KeepTogether
-from reportlab.lib.styles import getSampleStyleSheet
+from signal_readers import open_record
+from view_range import ExtentIndex, ViewRangeController, defer_extent_index, extent_index, has_extent_index, register_extent_index, signals_extent
+from workers import WorkerPool, attach_array, index_source, load_csv_channel, score_source
+from annotations import ANNOTATION_KINDS, Annotation, AnnotationStore
+from monitor_protocol import DEFAULT_MONITOR_PORT
+from render_backends import AnnotationsItem, BatchedCurvesItem, SweepTracesItem
+from frame_cache import FrameCache
+from export import EXPORT_FORMATS, RangeExport, prepare_specs, wfdb_scaling
+from memory_manager import STORAGE_TYPES, ManagedChannel, MemoryManager
+import instrumentation
+from spectrogram import SpectrogramPanel, SpectrogramTiles
+from timeline import Timeline, aligned_window, channel_rate, earliest_start, sources_rates
+from signal_quality import QualityMap, defer_quality_map, has_quality_map, quality_map, rate_chunk_size, register_quality_map
+from template_search import search_channels, search_folder
+from session import describe_source, cache_source, open_source, write_session, read_session
+from channel_cache import load_extent
+
+# timer interval (ms) of each entry of the speed combobox: 0.5x, 1x, 1.5x, 2x
+SPEED_INTERVALS = (300, 200, 100, 50)
+# sweep length (s) of each entry of the sweep window combobox, 1.6 s is the 200 samples of the scrolling window at 125 Hz
+SWEEP_WINDOWS = (1.6, 5, 10, 20, 30)
 
 class PlotUpdater(QObject):
     """
@@ -27,6 +43,8 @@ class PlotUpdater(QObject):
         super().__init__()
         self.position = position
         self.update_interval = update_interval
+        self.step = 1
+        self._fraction = 0.0
         self.timer = QTimer()
         self.timer.timeout.connect(self.update)
 
@@ -57,6 +75,15 @@ class PlotUpdater(QObject):
             - To keep track of the index of the fisrt point of the part of the signal that should be displayed.
         """
         self.position = position
+        self._fraction = 0.0
+
+    def set_step(self, step):
+        """
+        Description:
+            - Samples the position moves per update, fractional steps add up (a graph linked to one at another rate).
+        """
+        self.step = step
+        self._fraction = 0.0
 
     def update(self):
         """
@@ -66,7 +93,10 @@ class PlotUpdater(QObject):
         # send a pyqt signal with the index of the first point of the part of signal that should be currently displayed 
         self.update_signal.emit(self.position)
         # increament the index 
-        self.position += 1 
+        self._fraction += self.step
+        advance = int(self._fraction)
+        self._fraction -= advance
+        self.position += advance
         
 class Overlay(QWidget):
     def __init__(self, side, parent=None):
@@ -226,6 +256,9 @@ class Ui_MainWindow(object):
         self.rewind_graph1 = QtWidgets.QPushButton(self.frame_5)
         self.rewind_graph1.setObjectName("rewind_graph1")
         self.horizontalLayout_3.addWidget(self.rewind_graph1)
+        self.clear_graph1 = QtWidgets.QPushButton(self.frame_5)
+        self.clear_graph1.setObjectName("clear_graph1")
+        self.horizontalLayout_3.addWidget(self.clear_graph1)
         self.horizontalLayout_3.setStretch(3,1)
         self.label_4 = QtWidgets.QLabel(self.frame_5)
         self.label_4.setObjectName("label_4")
@@ -243,6 +276,10 @@ class Ui_MainWindow(object):
         self.save_photo_graph1.setObjectName("save_photo_graph1")
         self.horizontalLayout_3.addWidget(self.save_photo_graph1)
         self.horizontalLayout_3.setStretch(6,1)
+        self.search_button1 = QtWidgets.QPushButton(self.frame_5)
+        self.search_button1.setObjectName("search_button1")
+        self.horizontalLayout_3.addWidget(self.search_button1)
+        self.horizontalLayout_3.setStretch(7,1)
         self.verticalLayout.addLayout(self.horizontalLayout_3)
         self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_2.setObjectName("horizontalLayout_2")
@@ -280,12 +317,39 @@ class Ui_MainWindow(object):
         self.checkBox_show_graph1.setObjectName("checkBox_show_graph1")
         self.horizontalLayout_2.addWidget(self.checkBox_show_graph1)
         self.horizontalLayout_2.setStretch(6,0)
+        self.annotate_button1 = QtWidgets.QPushButton(self.frame_5)
+        self.annotate_button1.setObjectName("annotate_button1")
+        self.horizontalLayout_2.addWidget(self.annotate_button1)
+        self.start_time_button1 = QtWidgets.QPushButton(self.frame_5)
+        self.start_time_button1.setObjectName("start_time_button1")
+        self.horizontalLayout_2.addWidget(self.start_time_button1)
+        self.horizontalLayout_2.setStretch(7,1)
         self.verticalLayout.addLayout(self.horizontalLayout_2)
         self.horizontalLayout_18 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_18.setObjectName("horizontalLayout_18")
         self.checkBox_link = QtWidgets.QCheckBox(self.frame_5)
         self.checkBox_link.setObjectName("checkBox_link")
         self.horizontalLayout_18.addWidget(self.checkBox_link)
+        self.checkBox_batched = QtWidgets.QCheckBox(self.frame_5)
+        self.checkBox_batched.setObjectName("checkBox_batched")
+        self.horizontalLayout_18.addWidget(self.checkBox_batched)
+        self.checkBox_sweep = QtWidgets.QCheckBox(self.frame_5)
+        self.checkBox_sweep.setObjectName("checkBox_sweep")
+        self.horizontalLayout_18.addWidget(self.checkBox_sweep)
+        self.comboBox_sweep_window = QtWidgets.QComboBox(self.frame_5)
+        self.comboBox_sweep_window.setObjectName("comboBox_sweep_window")
+        for _ in SWEEP_WINDOWS:
+            self.comboBox_sweep_window.addItem("")
+        self.horizontalLayout_18.addWidget(self.comboBox_sweep_window)
+        self.checkBox_autoscale = QtWidgets.QCheckBox(self.frame_5)
+        self.checkBox_autoscale.setObjectName("checkBox_autoscale")
+        self.horizontalLayout_18.addWidget(self.checkBox_autoscale)
+        self.checkBox_spectrogram = QtWidgets.QCheckBox(self.frame_5)
+        self.checkBox_spectrogram.setObjectName("checkBox_spectrogram")
+        self.horizontalLayout_18.addWidget(self.checkBox_spectrogram)
+        self.checkBox_quality = QtWidgets.QCheckBox(self.frame_5)
+        self.checkBox_quality.setObjectName("checkBox_quality")
+        self.horizontalLayout_18.addWidget(self.checkBox_quality)
         self.verticalLayout.addSpacing(30)
         self.verticalLayout.addLayout(self.horizontalLayout_18)
         self.gridLayout_3.addWidget(self.frame_5, 0, 0, 1, 1)
@@ -320,6 +384,9 @@ class Ui_MainWindow(object):
         self.rewind_graph2 = QtWidgets.QPushButton(self.frame_6)
         self.rewind_graph2.setObjectName("rewind_graph2")
         self.horizontalLayout_4.addWidget(self.rewind_graph2)
+        self.clear_graph2 = QtWidgets.QPushButton(self.frame_6)
+        self.clear_graph2.setObjectName("clear_graph2")
+        self.horizontalLayout_4.addWidget(self.clear_graph2)
         self.horizontalLayout_4.setStretch(3,1)
         self.label_3 = QtWidgets.QLabel(self.frame_6)
         self.label_3.setObjectName("label_3")
@@ -337,6 +404,10 @@ class Ui_MainWindow(object):
         self.save_photo_graph2.setObjectName("save_photo_graph2")
         self.horizontalLayout_4.addWidget(self.save_photo_graph2)
         self.horizontalLayout_4.setStretch(6,1)
+        self.search_button2 = QtWidgets.QPushButton(self.frame_6)
+        self.search_button2.setObjectName("search_button2")
+        self.horizontalLayout_4.addWidget(self.search_button2)
+        self.horizontalLayout_4.setStretch(7,1)
         self.verticalLayout_2.addLayout(self.horizontalLayout_4)
         self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_6.setObjectName("horizontalLayout_6")
@@ -374,10 +445,32 @@ class Ui_MainWindow(object):
         self.checkBox_show_graph2.setObjectName("checkBox_show_graph2")
         self.horizontalLayout_6.addWidget(self.checkBox_show_graph2)
         self.horizontalLayout_6.setStretch(6,0)
+        self.annotate_button2 = QtWidgets.QPushButton(self.frame_6)
+        self.annotate_button2.setObjectName("annotate_button2")
+        self.horizontalLayout_6.addWidget(self.annotate_button2)
+        self.start_time_button2 = QtWidgets.QPushButton(self.frame_6)
+        self.start_time_button2.setObjectName("start_time_button2")
+        self.horizontalLayout_6.addWidget(self.start_time_button2)
+        self.horizontalLayout_6.setStretch(7,1)
         self.verticalLayout_2.addLayout(self.horizontalLayout_6)
         self.horizontalLayout_17 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_17.setObjectName("horizontalLayout_17")
         self.horizontalLayout_17.addStretch()
+        self.server_button = QtWidgets.QPushButton(self.frame_6)
+        self.server_button.setObjectName("server_button")
+        self.horizontalLayout_17.addWidget(self.server_button)
+        self.save_session_button = QtWidgets.QPushButton(self.frame_6)
+        self.save_session_button.setObjectName("save_session_button")
+        self.horizontalLayout_17.addWidget(self.save_session_button)
+        self.load_session_button = QtWidgets.QPushButton(self.frame_6)
+        self.load_session_button.setObjectName("load_session_button")
+        self.horizontalLayout_17.addWidget(self.load_session_button)
+        self.export_button = QtWidgets.QPushButton(self.frame_6)
+        self.export_button.setObjectName("export_button")
+        self.horizontalLayout_17.addWidget(self.export_button)
+        self.memory_button = QtWidgets.QPushButton(self.frame_6)
+        self.memory_button.setObjectName("memory_button")
+        self.horizontalLayout_17.addWidget(self.memory_button)
         self.make_report = QtWidgets.QPushButton(self.frame_6)
         self.make_report.setObjectName("make_report")
         self.horizontalLayout_17.addWidget(self.make_report)
@@ -437,8 +530,14 @@ class Ui_MainWindow(object):
         self.overlay2  = Overlay('right',self.centralwidget)
         self.widget.setLabel('left', 'Amplitude')
         self.widget.setLabel('bottom', 'Time (s)')
+        self.widget_plot.time_origin= None
         self.widget_2.setLabel('left', 'Amplitude')
         self.widget_2.setLabel('bottom', 'Time (s)')
+        self.widget_2_plot.time_origin= None
+        self.view_range1= ViewRangeController(self.widget)
+        self.view_range2= ViewRangeController(self.widget_2)
+        # y range base of each graph, set by every frame that shows samples
+        self.minimum1= self.maximum1= self.minimum2= self.maximum2= 0
         self.widget.scene().sigMouseClicked.connect(lambda event, flag=True: self.Browse(event, flag))
         self.widget_2.scene().sigMouseClicked.connect(lambda event, flag=False: self.Browse(event, flag))
         self.scale_factor_graph1=1
@@ -456,7 +555,23 @@ class Ui_MainWindow(object):
         self.pause_graph2.clicked.connect(lambda: self.pause(False))
         self.rewind_graph1.clicked.connect(lambda: self.rewind(True))
         self.rewind_graph2.clicked.connect(lambda: self.rewind(False))
+        self.clear_graph1.clicked.connect(lambda: self.clear_graph(True))
+        self.clear_graph2.clicked.connect(lambda: self.clear_graph(False))
         self.checkBox_link.clicked.connect(self.link)
+        self.batched_rendering= False
+        self.batched_curves1= BatchedCurvesItem()
+        self.batched_curves2= BatchedCurvesItem()
+        self.checkBox_batched.clicked.connect(self.set_batched_rendering)
+        self.sweep_mode= False
+        # rate of the signals without one (e.g. CSV files), each graph counts samples at the rate of its own signals
+        self.sampling_frequency= 125
+        self.sweep_window= SWEEP_WINDOWS[0]
+        self.sweep_traces1= SweepTracesItem(self.sweep_length(self.sampling_frequency))
+        self.sweep_traces2= SweepTracesItem(self.sweep_length(self.sampling_frequency))
+        self.checkBox_sweep.clicked.connect(self.set_sweep_mode)
+        self.comboBox_sweep_window.activated.connect(self.set_sweep_window)
+        self.autoscale= False
+        self.checkBox_autoscale.clicked.connect(self.set_autoscale)
         self.pushButton.clicked.connect(lambda: self.Move_signals(True))
         self.pushButton_2.clicked.connect(lambda: self.Move_signals(False))
         self.visability1=[]
@@ -471,12 +586,11 @@ class Ui_MainWindow(object):
         self.labels1=[]
         self.colours2=[]
         self.labels2=[]
+        self.sources1=[]
+        self.sources2=[]
         self.current_directory = os.path.dirname(os.path.abspath(__file__))
-        image_files = [file for file in os.listdir(self.current_directory) if file.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        # if there was a snapshots taken from thre previous run of the program left with the script in the same folder delete them (the copy in the folder previous snapshots wont be removed)
-        for image_file in image_files:
-            snapshot_path = os.path.join(self.current_directory, image_file)
-            os.remove(snapshot_path)
+        # runs once the event loop starts, after the window is shown
+        QTimer.singleShot(0, self.remove_old_snapshots)
         self.widget.mousePressEvent = lambda event:self.start_panning (event, True)
         self.widget.mouseMoveEvent = lambda event:self.trace_panning (event, True)
         self.widget_2.mousePressEvent = lambda event:self.start_panning (event, False)
@@ -491,8 +605,45 @@ class Ui_MainWindow(object):
         self.save_photo_graph2.clicked.connect(lambda: self.snapshot_graph2(self.widget_2))
         
         self.make_report.clicked.connect(self.make_the_report)
+        self.save_session_button.clicked.connect(self.save_session)
+        self.load_session_button.clicked.connect(self.load_session)
         # List to store snapshots
         self.snapshots1 = [] 
+        self.workers= WorkerPool()
+        self.monitor_server= None
+        self.server_button.clicked.connect(self.toggle_server)
+        self.annotations= AnnotationStore()
+        self.annotations_item1= AnnotationsItem()
+        self.annotations_item2= AnnotationsItem()
+        self.widget_plot.addItem(self.annotations_item1, ignoreBounds=True)
+        self.widget_2_plot.addItem(self.annotations_item2, ignoreBounds=True)
+        self.quality_item1= AnnotationsItem()
+        self.quality_item2= AnnotationsItem()
+        self.widget_plot.addItem(self.quality_item1, ignoreBounds=True)
+        self.widget_2_plot.addItem(self.quality_item2, ignoreBounds=True)
+        self.checkBox_quality.clicked.connect(self.set_quality_shading)
+        self.annotate_button1.clicked.connect(lambda: self.add_annotation(True))
+        self.annotate_button2.clicked.connect(lambda: self.add_annotation(False))
+        self.timeline1= Timeline()
+        self.timeline2= Timeline()
+        self.start_time_button1.clicked.connect(lambda: self.set_start_time(True))
+        self.start_time_button2.clicked.connect(lambda: self.set_start_time(False))
+        self.template_region1= None
+        self.template_region2= None
+        self.search_results_dialogs= {}
+        self.search_button1.clicked.connect(lambda: self.search_template(True))
+        self.search_button2.clicked.connect(lambda: self.search_template(False))
+        self.spectrogram_panel1= None
+        self.spectrogram_panel2= None
+        self.spectrogram_tiles= SpectrogramTiles()
+        self.frame_cache1= FrameCache("frame_cache1")
+        self.frame_cache2= FrameCache("frame_cache2")
+        self.memory= MemoryManager(submit_thread=self.workers.submit_thread)
+        self.memory_button.clicked.connect(self.show_memory_usage)
+        self.export_button.clicked.connect(self.export_range)
+        self.range_export= None
+        self.report_path= None
+        self.checkBox_spectrogram.clicked.connect(self.set_spectrogram)
 
     def Browse(self,event, flag):
         """
@@ -502,20 +653,275 @@ class Ui_MainWindow(object):
             - flag: takes value zero in the desired graph is the second, and value 1 if the desired graph is the first
         """
         if event.double():
-            self.filename=QFileDialog.getOpenFileName(filter="csv (*.csv)")[0]
-            self.df=pd.read_csv(self.filename,encoding='utf-8').fillna(0)
-            self.sampling_frequency= 125
-            if flag:
-                self.add_browsed_signal(self.magnitude_graph1, self.widget_plot, self.plot_items_graph1, self.colours1, self.labels1, self.visability1, self.comboBox_signals_graph1, self.pause_graph1, self.plot_updater1)
+            self.filename=QFileDialog.getOpenFileName(filter="Signals (*.csv *.hea *.edf);;csv (*.csv);;WFDB (*.hea);;EDF (*.edf)")[0]
+            if not self.filename:
+                return
+            if self.filename.lower().endswith('.csv'):
+                source= describe_source(self.filename, 'Voltage', 125)
+                if not self.accept_sampling_frequency(flag, source["sampling_frequency"]):
+                    self.show_rate_mismatch(flag, [f"{os.path.basename(self.filename)} (125 Hz)"])
+                    return
+                # parsing runs in a worker process, the signal is added when its shared array is ready
+                self.workers.submit(lambda result, flag=flag, source=source: self.add_parsed_signal(flag, result, source), load_csv_channel, self.filename, 'Voltage', source["sampling_frequency"], error_callback=self.show_load_error)
             else:
-                self.add_browsed_signal(self.magnitude_graph2, self.widget_2_plot, self.plot_items_graph2, self.colours2, self.labels2, self.visability2, self.comboBox_signals_graph2, self.pause_graph2, self.plot_updater2)
+                # binary recordings stay memory mapped, each channel is decoded on demand while plotting
+                try:
+                    record= open_record(self.filename)
+                except (ValueError, OSError) as error:
+                    self.show_load_error(error)
+                    return
+                refused= []
+                for channel in record.channels():
+                    sampling_frequency= record.sampling_frequencies[channel.index]
+                    if self.accept_sampling_frequency(flag, sampling_frequency):
+                        self.add_signal(flag, channel, channel.label, describe_source(self.filename, channel.index, sampling_frequency, record.start_time))
+                    else:
+                        refused.append(f"{channel.label} ({sampling_frequency:g} Hz)")
+                if refused:
+                    self.show_rate_mismatch(flag, refused)
+
+    def accept_sampling_frequency(self, flag, sampling_frequency):
+        """
+        Description:
+            - The signals of a graph share its time axis, counted in samples of their rate: a signal sampled at
+              another rate goes to the other graph (linked graphs are converted through seconds) or to a cleared one.
+        """
+        return sources_rates(self.sources1 if flag else self.sources2, self.sampling_frequency) <= {sampling_frequency}
+
+    def show_rate_mismatch(self, flag, names):
+        rate= self.timeline(flag).sampling_frequency
+        QMessageBox.warning(None, "Open Signal", f"Not loaded in graph {1 if flag else 2}, sampled at another rate than its signals ({rate:g} Hz). Load them in the other graph or clear this one:\n" + "\n".join(names))
+
+    def add_parsed_signal(self, flag, result, source):
+        # another recording may have been loaded while this one was parsed
+        if not self.accept_sampling_frequency(flag, source["sampling_frequency"]):
+            self.show_rate_mismatch(flag, [f"{os.path.basename(source['path'])} ({source['sampling_frequency']:g} Hz)"])
+            return
+        descriptor, block_minimum, block_maximum, quality = result
+        samples= self.memory.manage(attach_array(descriptor), self.signal_name(None, source))
+        register_extent_index(samples, ExtentIndex.from_blocks(block_minimum, block_maximum))
+        register_quality_map(samples, quality)
+        self.add_signal(flag, samples, None, source)
+
+    def show_load_error(self, error):
+        QMessageBox.warning(None, "Open Signal", f"Could not load the signal: {error}")
+
+    def add_signal(self, flag, samples, label, source):
+        samples= self.memory.manage(samples, self.signal_name(label, source))
+        if source is not None:
+            self.index_signal(samples, source)
+        self.score_signal(samples, source)
+        if flag:
+            self.add_browsed_signal(samples, label, source, self.magnitude_graph1, self.widget_plot, self.plot_items_graph1, self.colours1, self.labels1, self.visability1, self.sources1, self.comboBox_signals_graph1, self.pause_graph1, self.plot_updater1)
+        else:
+            self.add_browsed_signal(samples, label, source, self.magnitude_graph2, self.widget_2_plot, self.plot_items_graph2, self.colours2, self.labels2, self.visability2, self.sources2, self.comboBox_signals_graph2, self.pause_graph2, self.plot_updater2)
+        self.set_playback_steps()
     
-    def add_browsed_signal(self, mag_array, plot_widget, plot_items, colours, labels, visability, combobox, pause_button, plot_updater):
-        mag_array.append(self.df['Voltage'].values)
-        widget_curve= plot_widget.plot(name="plot"+ str(len(self.labels1)) )
+    def index_signal(self, samples, source):
+        """
+        Description:
+            - Min/max block index of a recording's channel, read from the channel cache or built by a worker.
+            - Until the worker is done the graphs use the range of the shown window, so opening or restoring large
+              recordings never scans them on the GUI thread.
+        """
+        if has_extent_index(samples):
+            return
+        blocks= load_extent(source["hash"], source["channel"])
+        if blocks is not None:
+            register_extent_index(samples, ExtentIndex.from_blocks(*blocks))
+            return
+        defer_extent_index(samples)
+        self.workers.submit(lambda blocks, samples=samples: self.extent_index_ready(samples, blocks), index_source, source)
+
+    def extent_index_ready(self, samples, blocks):
+        register_extent_index(samples, ExtentIndex.from_blocks(*blocks))
+        # a paused graph keeps the provisional range until it is drawn again
+        if any(signal is samples for signal in self.magnitude_graph1) and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if any(signal is samples for signal in self.magnitude_graph2) and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def score_signal(self, samples, source):
+        """
+        Description:
+            - Quality map of a channel, scored in one second chunks on the worker pool (on a thread for a signal
+              without a file). Until it is ready the signal is not shaded and a report waits for it.
+        """
+        if has_quality_map(samples):
+            return
+        defer_quality_map(samples)
+        chunk_size= rate_chunk_size(channel_rate(source, self.sampling_frequency))
+        ready= lambda quality, samples=samples: self.quality_map_ready(samples, quality)
+        # without a map the report would wait forever, an empty one leaves the signal unshaded and its statistics NaN
+        failed= lambda error, samples=samples, chunk_size=chunk_size: (instrumentation.logger.error("quality scoring failed", exc_info=error), self.quality_map_ready(samples, QualityMap(chunk_size)))
+        if source is None:
+            self.workers.submit_thread(ready, QualityMap.from_samples, samples, chunk_size, error_callback=failed)
+        else:
+            self.workers.submit(ready, score_source, source, chunk_size, error_callback=failed)
+
+    def quality_map_ready(self, samples, quality):
+        register_quality_map(samples, quality)
+        if self.report_path is not None:
+            self.write_report_when_scored()
+        if not self.checkBox_quality.isChecked():
+            return
+        if any(signal is samples for signal in self.magnitude_graph1) and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if any(signal is samples for signal in self.magnitude_graph2) and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    @staticmethod
+    def signal_name(label, source):
+        if source is not None:
+            return f"{os.path.basename(source['path'])}#{source['channel']}"
+        return label or "signal"
+
+    def show_memory_usage(self):
+        """
+        Description:
+            - Memory budget and storage type of loaded signals, with the size each signal keeps in memory.
+        """
+        dialog= QtWidgets.QDialog()
+        dialog.setWindowTitle("Memory")
+        layout= QVBoxLayout(dialog)
+        form= QtWidgets.QFormLayout()
+        budget= QtWidgets.QSpinBox(dialog)
+        budget.setRange(16, 1 << 20)
+        budget.setSuffix(" MB")
+        budget.setValue(self.memory.budget_bytes >> 20)
+        form.addRow("Memory budget:", budget)
+        storage= QtWidgets.QComboBox(dialog)
+        storage.addItems(STORAGE_TYPES)
+        storage.setCurrentText(self.memory.storage)
+        storage.setToolTip("Used for the signals loaded next")
+        form.addRow("Store samples as:", storage)
+        layout.addLayout(form)
+        rows= [(label, "Graph 1", samples) for label, samples in zip(self.labels1, self.magnitude_graph1)]
+        rows+= [(label, "Graph 2", samples) for label, samples in zip(self.labels2, self.magnitude_graph2)]
+        table= QtWidgets.QTableWidget(len(rows), 4, dialog)
+        table.setHorizontalHeaderLabels(["Signal", "Graph", "Storage", "In memory"])
+        for row, (label, graph, samples) in enumerate(rows):
+            if isinstance(samples, ManagedChannel):
+                storage_text= samples.storage
+                resident_text= f"{samples.resident_bytes / (1 << 20):.1f} MB" if samples.resident else "paged out"
+            else:
+                storage_text, resident_text= "file", "memory mapped"
+            for column, text in enumerate((label, graph, storage_text, resident_text)):
+                table.setItem(row, column, QtWidgets.QTableWidgetItem(text))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+        layout.addWidget(QtWidgets.QLabel(f"Total in memory: {self.memory.resident_bytes / (1 << 20):.1f} MB", dialog))
+        buttons= QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel, dialog)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        if dialog.exec_() == QtWidgets.QDialog.Accepted:
+            self.memory.storage= storage.currentText()
+            self.memory.set_budget(budget.value() << 20)
+
+    def export_range(self):
+        """
+        Description:
+            - Export chosen signals over a time range (the window shown in graph 1 by default) to CSV or a 16-bit WFDB record.
+            - The file is written chunk by chunk on a worker straight from the recordings / memory-mapped samples.
+        """
+        # each signal is placed on the timeline of its graph: (label, samples, offset, timeline)
+        timeline1, timeline2= self.timeline(True), self.timeline(False)
+        signals= [(label, samples, offset, timeline1) for label, samples, offset in zip(self.labels1, self.magnitude_graph1, timeline1.offsets)]
+        signals+= [(label, samples, offset, timeline2) for label, samples, offset in zip(self.labels2, self.magnitude_graph2, timeline2.offsets)]
+        if not signals:
+            return
+        dialog= QtWidgets.QDialog()
+        dialog.setWindowTitle("Export Range")
+        layout= QVBoxLayout(dialog)
+        signal_list= QtWidgets.QListWidget(dialog)
+        for index, (label, *_) in enumerate(signals):
+            item= QtWidgets.QListWidgetItem(f"{label} (Graph {1 if index < len(self.labels1) else 2})")
+            item.setCheckState(Qt.Checked if index < len(self.labels1) else Qt.Unchecked)
+            signal_list.addItem(item)
+        layout.addWidget(signal_list)
+        form= QtWidgets.QFormLayout()
+        duration= max(timeline.seconds(timeline.length) for timeline in (timeline1, timeline2) if timeline.length)
+        start_time= QtWidgets.QDoubleSpinBox(dialog)
+        end_time= QtWidgets.QDoubleSpinBox(dialog)
+        for spin_box in (start_time, end_time):
+            spin_box.setRange(0, duration)
+            spin_box.setDecimals(3)
+            spin_box.setSuffix(" s")
+        position, timeline= (self.plot_updater1.position, timeline1) if self.magnitude_graph1 else (self.plot_updater2.position, timeline2)
+        start_time.setValue(timeline.seconds(position))
+        end_time.setValue(timeline.seconds(position + 200))
+        form.addRow("From:", start_time)
+        form.addRow("To:", end_time)
+        export_format= QtWidgets.QComboBox(dialog)
+        export_format.addItems(EXPORT_FORMATS)
+        form.addRow("Format:", export_format)
+        layout.addLayout(form)
+        buttons= QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel, dialog)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        chosen= [signals[row] for row in range(signal_list.count()) if signal_list.item(row).checkState() == Qt.Checked]
+        if not chosen:
+            return
+        # one row (CSV) or frame (WFDB) per sample: the chosen signals must share their rate
+        rates= {timeline.sampling_frequency for *_, timeline in chosen}
+        if len(rates) > 1:
+            self.show_export_error("the chosen signals are sampled at different rates (" + ", ".join(f"{rate:g} Hz" for rate in sorted(rates)) + "), export them separately")
+            return
+        timeline= chosen[0][3]
+        start, stop= timeline.to_position(start_time.value()), timeline.to_position(end_time.value())
+        if stop <= start:
+            return
+        csv_format= export_format.currentText() == "CSV"
+        file_path, _ = QFileDialog.getSaveFileName(None, "Export Range", self.current_directory, "CSV Files (*.csv)" if csv_format else "WFDB Header (*.hea)")
+        if file_path:
+            self.start_export(file_path, export_format.currentText(), [(label, samples, offset) for label, samples, offset, _ in chosen], start, stop, timeline.sampling_frequency)
+
+    def start_export(self, file_path, export_format, signals, start, stop, sampling_frequency):
+        progress= QtWidgets.QProgressDialog("Exporting...", "Cancel", 0, 1000)
+        progress.setWindowTitle("Export Range")
+        progress.setMinimumDuration(0)
+        self.export_progress= progress
+        try:
+            prepare_specs(self.workers, self.memory, [samples for _, samples, _ in signals], lambda specs: self.run_export(progress, file_path, export_format, signals, specs, start, stop, sampling_frequency), lambda error: (progress.reset(), self.show_export_error(error)))
+        except ValueError as error:
+            progress.reset()
+            self.show_export_error(error)
+
+    def run_export(self, progress, file_path, export_format, signals, specs, start, stop, sampling_frequency):
+        """
+        Description:
+            - Write the export once the worker processes can read every chosen signal.
+            - signals: (label, samples, offset on the graph's timeline); start and stop are timeline samples.
+        """
+        if progress.wasCanceled():
+            return
+        labels= [label for label, _, _ in signals]
+        units= [getattr(samples, "units", "mV") for _, samples, _ in signals]
+        offsets= [offset for _, _, offset in signals]
+        scaling= None
+        if export_format != "CSV":
+            # a signal whose index is still being built is scanned here, the export reads all of it anyway
+            scaling= [wfdb_scaling(*(extent_index(samples) or ExtentIndex(samples)).window(start - offset, stop - offset)) for _, samples, offset in signals]
+        self.range_export= RangeExport(self.workers, file_path, export_format, specs, labels, units, start, stop, sampling_frequency, scaling, offsets)
+        progress.canceled.connect(self.range_export.cancel)
+        self.range_export.run(lambda fraction: progress.setValue(int(fraction * 1000)), lambda path: progress.reset(), lambda error: (progress.reset(), self.show_export_error(error)))
+
+    def show_export_error(self, error):
+        QMessageBox.warning(None, "Export Range", f"Could not export: {error}")
+
+    def add_browsed_signal(self, samples, label, source, mag_array, plot_widget, plot_items, colours, labels, visability, sources, combobox, pause_button, plot_updater):
+        if not label:
+            label= "plot"+ str(len(labels))
+        mag_array.append(samples)
+        sources.append(source)
+        widget_curve= plot_widget.plot(name=label)
         plot_items.append(widget_curve)
         colours.append("red")
-        labels.append("plot"+ str(len(labels)))
+        labels.append(label)
         visability.append(True)
         combobox.clear()
         for Combobox_it in range (len(labels)):
@@ -529,85 +935,514 @@ class Ui_MainWindow(object):
             self.max_pos1= position
         self.max1=0
         self.min1= math.inf
-        self.minimum1= np.array(self.magnitude_graph1).min()
-        self.maximum1= np.array(self.magnitude_graph1).max()
-        if position <= len(self.magnitude_graph1[0])- 200:
-            for index, volt in enumerate(self.magnitude_graph1):
-                y_values=volt[position: position +200]
-                max= np.array(y_values).max()
-                if max> self.max1:
-                    self.max1= max
-                min= np.array(y_values).min()
-                if min< self.min1:
-                    self.min1= min
-                x_values=np.linspace(position/ self.sampling_frequency, (position + 200)/self.sampling_frequency, 200)
-                self.plot_items_graph1[index].setData(x_values, y_values, name= self.labels1[index])
-                self.plot_items_graph1[index].setPen(self.colours1[index])
-                self.plot_items_graph1[index].setVisible(self.visability1[index])
-                self.update_scrolling_slider_value(True)
-            self.widget.setXRange(position/ self.sampling_frequency, (position + 200)/self.sampling_frequency)
-            self.widget.setYRange(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 + self.panning_offset1)
+        timeline= self.timeline(True)
+        self.update_time_axis(self.widget_plot, timeline)
+        if position <= timeline.length- 200:
+            if self.autoscale:
+                self.minimum1, self.maximum1= self.view_range1.autoscale_extent(self.magnitude_graph1, position, position + 200, timeline.offsets)
+            else:
+                self.minimum1, self.maximum1= signals_extent(self.magnitude_graph1, position, position + 200, timeline.offsets)
+            if self.sweep_mode:
+                self.sweep_frame(position, self.magnitude_graph1, timeline, self.view_range1, self.sweep_traces1, self.plot_items_graph1, self.colours1, self.visability1)
+                # the sweep only touches the new samples, the panning limits use the whole signal range
+                self.min1, self.max1= self.minimum1, self.maximum1
+            else:
+                batch= []
+                x_values, windows, minimum, maximum= self.frame_cache1.frame(self.magnitude_graph1, position, 200, timeline.sampling_frequency, timeline.offsets)
+                self.min1= min(self.min1, minimum)
+                self.max1= max(self.max1, maximum)
+                for index, y_values in enumerate(windows):
+                    if self.batched_rendering:
+                        # the curve item only feeds the legend, the samples are drawn by the batched item
+                        batch.append(y_values)
+                        self.sync_legend_item(self.plot_items_graph1[index], self.colours1[index], self.visability1[index])
+                    else:
+                        self.plot_items_graph1[index].setData(x_values, y_values, name= self.labels1[index])
+                        self.plot_items_graph1[index].setPen(self.colours1[index])
+                        self.plot_items_graph1[index].setVisible(self.visability1[index])
+                if self.batched_rendering:
+                    self.batched_curves1.set_curves(x_values, batch, self.colours1, self.visability1)
+                self.view_range1.set_x_range(timeline.seconds(position), timeline.seconds(position + 200))
+            self.update_scrolling_slider_value(True, timeline)
+            self.view_range1.set_y_range(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 + self.panning_offset1)
+            self.show_annotations(position, self.sources1, timeline, self.annotations_item1)
+            self.show_quality(position, self.magnitude_graph1, timeline, self.visability1, self.quality_item1)
+            if self.checkBox_spectrogram.isChecked() and not self.sweep_mode:
+                self.update_spectrogram(position, self.magnitude_graph1, self.sources1, timeline, getattr(self, 'selected_plot_index1', None), self.spectrogram_panel1)
+            self.view_range1.flush()
         
     def get_and_plot_data_in_graph2(self, position):
         if position> self.max_pos2:
             self.max_pos2= position
         self.max2=0
         self.min2= math.inf
-        self.minimum2= np.array(self.magnitude_graph2).min()
-        self.maximum2= np.array(self.magnitude_graph2).max()
-        if position <= len(self.magnitude_graph2[0])- 200:
-            for index, volt in enumerate(self.magnitude_graph2):
-                y_values=volt[position: position +200]
-                max= np.array(y_values).max()
-                if max> self.max2:
-                    self.max2= max
-                min= np.array(y_values).min()
-                if min< self.min2:
-                    self.min2= min
-                x_values=np.linspace(position/ self.sampling_frequency, (position + 200)/self.sampling_frequency, 200)
-                self.plot_items_graph2[index].setData(x_values, y_values, name= self.labels2[index])
-                self.plot_items_graph2[index].setPen(self.colours2[index])
-                self.plot_items_graph2[index].setVisible(self.visability2[index])
-                self.update_scrolling_slider_value(False)
-            self.widget_2.setXRange(position/ self.sampling_frequency, (position + 200)/self.sampling_frequency)
-            self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+        timeline= self.timeline(False)
+        self.update_time_axis(self.widget_2_plot, timeline)
+        if position <= timeline.length- 200:
+            if self.autoscale:
+                self.minimum2, self.maximum2= self.view_range2.autoscale_extent(self.magnitude_graph2, position, position + 200, timeline.offsets)
+            else:
+                self.minimum2, self.maximum2= signals_extent(self.magnitude_graph2, position, position + 200, timeline.offsets)
+            if self.sweep_mode:
+                self.sweep_frame(position, self.magnitude_graph2, timeline, self.view_range2, self.sweep_traces2, self.plot_items_graph2, self.colours2, self.visability2)
+                # the sweep only touches the new samples, the panning limits use the whole signal range
+                self.min2, self.max2= self.minimum2, self.maximum2
+            else:
+                batch= []
+                x_values, windows, minimum, maximum= self.frame_cache2.frame(self.magnitude_graph2, position, 200, timeline.sampling_frequency, timeline.offsets)
+                self.min2= min(self.min2, minimum)
+                self.max2= max(self.max2, maximum)
+                for index, y_values in enumerate(windows):
+                    if self.batched_rendering:
+                        # the curve item only feeds the legend, the samples are drawn by the batched item
+                        batch.append(y_values)
+                        self.sync_legend_item(self.plot_items_graph2[index], self.colours2[index], self.visability2[index])
+                    else:
+                        self.plot_items_graph2[index].setData(x_values, y_values, name= self.labels2[index])
+                        self.plot_items_graph2[index].setPen(self.colours2[index])
+                        self.plot_items_graph2[index].setVisible(self.visability2[index])
+                if self.batched_rendering:
+                    self.batched_curves2.set_curves(x_values, batch, self.colours2, self.visability2)
+                self.view_range2.set_x_range(timeline.seconds(position), timeline.seconds(position + 200))
+            self.update_scrolling_slider_value(False, timeline)
+            self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+            self.show_annotations(position, self.sources2, timeline, self.annotations_item2)
+            self.show_quality(position, self.magnitude_graph2, timeline, self.visability2, self.quality_item2)
+            if self.checkBox_spectrogram.isChecked() and not self.sweep_mode:
+                self.update_spectrogram(position, self.magnitude_graph2, self.sources2, timeline, getattr(self, 'selected_plot_index2', None), self.spectrogram_panel2)
+            self.view_range2.flush()
         
     
-    def update_scrolling_slider_value(self, flag):
+    def sync_legend_item(self, item, colour, visible):
+        if getattr(item, 'legend_colour', None) != colour:
+            item.setPen(colour)
+            item.legend_colour= colour
+        item.setVisible(visible)
+
+    def show_annotations(self, position, sources, timeline, annotations_item):
+        """
+        Description:
+            - Mark the annotations of the graph's channels that fall in the displayed window.
+            - Annotation times are relative to their channel's start, they are shifted onto the graph's timeline.
+        """
+        first, stop= self.displayed_samples(position, timeline.sampling_frequency)
+        start, end= timeline.seconds(first), timeline.seconds(stop)
+        spans= []
+        for source, offset in zip(sources, timeline.offsets):
+            shift= timeline.seconds(offset)
+            for annotation in self.annotations.index_for(source).query(start - shift, end - shift):
+                spans.append((max(annotation.start + shift, start), min(annotation.end + shift, end), annotation.kind))
+        annotations_item.set_spans(self.displayed_spans(spans, timeline.sampling_frequency))
+
+    def show_quality(self, position, magnitude, timeline, visability, quality_item):
+        """
+        Description:
+            - Shade the parts of the displayed window where a visible signal is flat, clipped, noisy or missing.
+            - Uses the per-chunk quality map of each signal (one second chunks at its rate) once a worker scored it.
+        """
+        spans= []
+        if self.checkBox_quality.isChecked():
+            first, stop= self.displayed_samples(position, timeline.sampling_frequency)
+            for volt, offset, visible in zip(magnitude, timeline.offsets, visability):
+                quality= quality_map(volt) if visible and has_quality_map(volt) else None
+                if quality is not None:
+                    for span_start, span_end, _ in quality.bad_spans(first - offset, stop - offset):
+                        spans.append((timeline.seconds(span_start + offset), timeline.seconds(span_end + offset), "Poor signal"))
+        quality_item.set_spans(self.displayed_spans(spans, timeline.sampling_frequency))
+
+    def displayed_samples(self, position, sampling_frequency):
+        """
+        Description:
+            - Timeline samples [first, stop) shown at a playback position: the scrolling window, or the whole sweep.
+        """
+        if self.sweep_mode:
+            return position + 200 - self.sweep_length(sampling_frequency), position + 200
+        return position, position + 200
+
+    def displayed_spans(self, spans, sampling_frequency):
+        """
+        Description:
+            - Map (start, end, kind) spans in timeline seconds onto the x axis of the graph.
+            - The sweep x axis wraps every window, a span crossing the wrap is drawn in two parts.
+        """
+        if not self.sweep_mode:
+            return spans
+        window= self.sweep_length(sampling_frequency)/ sampling_frequency
+        displayed= []
+        for span_start, span_end, kind in spans:
+            sweep_start, sweep_end= span_start % window, span_start % window + (span_end - span_start)
+            displayed.append((sweep_start, min(sweep_end, window), kind))
+            if sweep_end > window:
+                displayed.append((0, sweep_end - window, kind))
+        return displayed
+
+    def add_annotation(self, flag):
+        """
+        Description:
+            - Annotate the selected signal at the newest displayed sample, optionally as an interval.
+        """
+        if flag:
+            index, sources, position= getattr(self, 'selected_plot_index1', None), self.sources1, self.plot_updater1.position
+        else:
+            index, sources, position= getattr(self, 'selected_plot_index2', None), self.sources2, self.plot_updater2.position
+        if index is None or index >= len(sources) or sources[index] is None:
+            QMessageBox.warning(None, "Annotate", "Select a signal loaded from a file first.")
+            return
+        kind, ok_pressed = QInputDialog.getItem(None, "Annotate", "Kind:", ANNOTATION_KINDS, 0, False)
+        if not ok_pressed:
+            return
+        text, ok_pressed = QInputDialog.getText(None, "Annotate", "Text:")
+        if not ok_pressed:
+            return
+        duration, ok_pressed = QInputDialog.getDouble(None, "Annotate", "Duration (s), 0 for an event:", 0, 0, 1e6, 2)
+        if not ok_pressed:
+            return
+        timeline= self.timeline(flag)
+        start= timeline.seconds(position + 200 - timeline.offsets[index])
+        self.annotations.index_for(sources[index]).add(Annotation(start, start + duration, kind, text))
+        try:
+            self.annotations.save(sources[index]['path'])
+        except OSError as error:
+            QMessageBox.warning(None, "Annotate", f"The annotation could not be saved next to the recording: {error}")
+        if flag and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        elif not flag and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def search_template(self, flag):
+        """
+        Description:
+            - First click: show a region on the displayed window to select the template.
+            - Second click: search the selected part of the chosen signal in all the loaded signals (and optionally a folder).
+        """
+        if self.sweep_mode:
+            QMessageBox.warning(None, "Find Similar", "Switch off the sweep mode to select a template.")
+            return
+        if flag:
+            plot, magnitude, region, position, button, index= self.widget_plot, self.magnitude_graph1, self.template_region1, self.plot_updater1.position, self.search_button1, getattr(self, 'selected_plot_index1', None)
+        else:
+            plot, magnitude, region, position, button, index= self.widget_2_plot, self.magnitude_graph2, self.template_region2, self.plot_updater2.position, self.search_button2, getattr(self, 'selected_plot_index2', None)
+        if not magnitude:
+            return
+        timeline= self.timeline(flag)
+        if region is None:
+            start, end= timeline.seconds(position), timeline.seconds(position + 200)
+            region= pg.LinearRegionItem(values=(start + (end - start)/ 4, end - (end - start)/ 4))
+            plot.addItem(region)
+            button.setText("Search Selection")
+        else:
+            plot.removeItem(region)
+            button.setText("Find Similar")
+            low, high= region.getRegion()
+            region= None
+            if index is None or index >= len(magnitude):
+                index= 0
+            offset= timeline.offsets[index]
+            first, last= max(int(low* timeline.sampling_frequency) - offset, 0), int(high* timeline.sampling_frequency) - offset
+            template= np.asarray(magnitude[index][first: last], dtype=np.float64)
+            if len(template) >= 2:
+                self.run_template_search(flag, index, first, template)
+        if flag:
+            self.template_region1= region
+        else:
+            self.template_region2= region
+
+    def run_template_search(self, flag, index, first, template):
+        scope, ok_pressed = QInputDialog.getItem(None, "Find Similar", "Search in:", ["Loaded signals", "Loaded signals and a folder"], 0, False)
+        if not ok_pressed:
+            return
+        # both searches run on the worker pool, playback goes on while long recordings are scanned
+        signals= [((True, i), samples) for i, samples in enumerate(self.magnitude_graph1)] + [((False, i), samples) for i, samples in enumerate(self.magnitude_graph2)]
+        # the template is resampled to the rate of each graph
+        rates= [self.timeline(graph_flag).sampling_frequency for (graph_flag, _), _ in signals]
+        sampling_frequency= self.timeline(flag).sampling_frequency
+        try:
+            prepare_specs(self.workers, self.memory, [samples for _, samples in signals], lambda specs: self.workers.submit(lambda results: self.show_loaded_search_results(signals, results), search_channels, [(key, spec, rate) for (key, _), spec, rate in zip(signals, specs, rates)], template, sampling_frequency, 10, ((flag, index), first), error_callback=self.show_search_error), self.show_search_error)
+        except ValueError as error:
+            self.show_search_error(error)
+        if scope != "Loaded signals":
+            directory= QFileDialog.getExistingDirectory(None, "Recordings Folder", self.current_directory)
+            if directory:
+                self.workers.submit(lambda results: self.show_folder_search_results(flag, results), search_folder, directory, template, sampling_frequency, error_callback=self.show_search_error)
+
+    def show_search_error(self, error):
+        QMessageBox.warning(None, "Find Similar", f"Could not search: {error}")
+
+    def show_loaded_search_results(self, signals, results):
+        searched= dict(signals)
+        items= []
+        for score, (graph_flag, signal_index), start in results:
+            magnitude, labels= (self.magnitude_graph1, self.labels1) if graph_flag else (self.magnitude_graph2, self.labels2)
+            # the graphs may have changed while the search ran
+            if signal_index >= len(magnitude) or magnitude[signal_index] is not searched[(graph_flag, signal_index)]:
+                continue
+            # seek works on the graph's timeline, where the channel starts at its offset
+            timeline= self.timeline(graph_flag)
+            position= start + timeline.offsets[signal_index]
+            items.append((f"{score:.3f}   {labels[signal_index]} (Graph {1 if graph_flag else 2})   {timeline.seconds(start):.2f} s", lambda graph_flag=graph_flag, position=position: self.seek(graph_flag, position)))
+        self.show_search_results("Similar Segments", items)
+
+    def show_folder_search_results(self, flag, results):
+        items= []
+        for score, (path, channel, label, sampling_frequency), start in results:
+            items.append((f"{score:.3f}   {os.path.basename(path)}: {label}   {start/ sampling_frequency:.2f} s", lambda path=path, channel=channel, label=label, sampling_frequency=sampling_frequency, start=start: self.open_match(flag, path, channel, label, sampling_frequency, start)))
+        self.show_search_results("Similar Segments in Folder", items)
+
+    def show_search_results(self, title, items):
+        """
+        Description:
+            - Ranked list of matches, double-clicking a match moves the view there.
+        Arg:
+            - items: list of (text, function showing the match).
+        """
+        dialog= QtWidgets.QDialog()
+        dialog.setWindowTitle(title)
+        layout= QVBoxLayout(dialog)
+        result_list= QtWidgets.QListWidget(dialog)
+        for text, _ in items:
+            result_list.addItem(text)
+        result_list.itemDoubleClicked.connect(lambda item: items[result_list.row(item)][1]())
+        layout.addWidget(result_list)
+        self.search_results_dialogs[title]= dialog
+        dialog.show()
+
+    def open_match(self, flag, path, channel, label, sampling_frequency, start):
+        """
+        Description:
+            - Show a match found in a folder: its channel is added to the template's graph (unless it is already
+              there) and the graph moves to the match.
+        """
+        if self.seek_in_source(flag, path, channel, start):
+            return
+        if not self.accept_sampling_frequency(flag, sampling_frequency):
+            self.show_rate_mismatch(flag, [f"{os.path.basename(path)}: {label} ({sampling_frequency:g} Hz)"])
+            return
+        if isinstance(channel, int):
+            try:
+                record= open_record(path)
+            except (ValueError, OSError) as error:
+                self.show_load_error(error)
+                return
+            self.add_signal(flag, record.channels()[channel], record.labels[channel], describe_source(path, channel, sampling_frequency, record.start_time))
+            self.seek_in_source(flag, path, channel, start)
+        else:
+            source= describe_source(path, channel, sampling_frequency)
+            self.workers.submit(lambda result: (self.add_parsed_signal(flag, result, source), self.seek_in_source(flag, path, channel, start)), load_csv_channel, path, channel, sampling_frequency, error_callback=self.show_load_error)
+
+    def seek_in_source(self, flag, path, channel, start):
+        """
+        Description:
+            - Move a graph to sample `start` of one of its channels, returns False when the channel is not loaded there.
+        """
+        sources= self.sources1 if flag else self.sources2
+        for index, source in enumerate(sources):
+            if source is not None and source["path"] == os.path.abspath(path) and source["channel"] == channel:
+                self.seek(flag, start + self.timeline(flag).offsets[index])
+                return True
+        return False
+
+    def seek(self, flag, sample):
+        """
+        Description:
+            - Move a graph so that the given sample is shown near the start of the window.
+        """
+        if flag:
+            position= min(max(sample - 50, 0), self.timeline(True).length - 200)
+            self.plot_updater1.set_position(position)
+            self.max_pos1= max(self.max_pos1, position)
+            if self.pause_graph1.text() == "Resume":
+                self.get_and_plot_data_in_graph1(position)
+        else:
+            position= min(max(sample - 50, 0), self.timeline(False).length - 200)
+            self.plot_updater2.set_position(position)
+            self.max_pos2= max(self.max_pos2, position)
+            if self.pause_graph2.text() == "Resume":
+                self.get_and_plot_data_in_graph2(position)
+
+    def set_spectrogram(self):
+        """
+        Description:
+            - Show/hide a spectrogram panel under each graph (created the first time it is needed).
+        """
+        if self.spectrogram_panel1 is None:
+            self.spectrogram_panel1= SpectrogramPanel(self.widget, self.spectrogram_tiles)
+            self.spectrogram_panel2= SpectrogramPanel(self.widget_2, self.spectrogram_tiles)
+            self.verticalLayout.insertWidget(1, self.spectrogram_panel1.widget)
+            self.verticalLayout_2.insertWidget(1, self.spectrogram_panel2.widget)
+        visible= self.checkBox_spectrogram.isChecked()
+        self.spectrogram_panel1.widget.setVisible(visible)
+        self.spectrogram_panel2.widget.setVisible(visible)
+        if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def update_spectrogram(self, position, magnitude, sources, timeline, index, panel):
+        if index is None or index >= len(magnitude):
+            index= 0
+        channel_key= self.annotations.key(sources[index]) if sources[index] is not None else id(magnitude[index])
+        offset= timeline.offsets[index]
+        panel.show_window(channel_key, magnitude[index], position - offset, position - offset + 200, timeline.sampling_frequency, self.workers.submit, timeline.seconds(offset))
+
+    def timeline(self, flag):
+        """
+        Description:
+            - Wall-clock timeline of a graph; linked graphs share the earliest start of both, so equal positions are the same time.
+        """
+        origin= earliest_start(self.sources1 + self.sources2) if self.checkBox_link.isChecked() else None
         if flag:
-            self.horizontalSlider.setValue(int(self.plot_updater1.position * self.horizontalSlider.maximum()/ len(self.magnitude_graph1[0])))
+            return self.timeline1.resolve(self.magnitude_graph1, self.sources1, self.sampling_frequency, origin)
+        return self.timeline2.resolve(self.magnitude_graph2, self.sources2, self.sampling_frequency, origin)
+
+    def update_time_axis(self, plot_widget, timeline):
+        if plot_widget.time_origin != timeline.origin:
+            plot_widget.time_origin= timeline.origin
+            plot_widget.setLabel('bottom', f"Time (s) from {timeline.origin:%Y-%m-%d %H:%M:%S}" if timeline.origin else 'Time (s)')
+
+    def set_start_time(self, flag):
+        """
+        Description:
+            - Set or correct the absolute start time of the selected signal, used to align it with the other recordings.
+        """
+        index, sources= (getattr(self, 'selected_plot_index1', None), self.sources1) if flag else (getattr(self, 'selected_plot_index2', None), self.sources2)
+        if index is None or index >= len(sources) or sources[index] is None:
+            QMessageBox.warning(None, "Start Time", "Select a signal loaded from a file first.")
+            return
+        text, ok_pressed = QInputDialog.getText(None, "Start Time", "Start time (YYYY-MM-DD HH:MM:SS.ffffff), empty if unknown:", text= sources[index].get("start_time") or "")
+        if not ok_pressed:
+            return
+        try:
+            sources[index]["start_time"]= datetime.fromisoformat(text.strip()).isoformat() if text.strip() else None
+        except ValueError:
+            QMessageBox.warning(None, "Start Time", f"Not a valid time: {text}")
+            return
+        if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def sweep_frame(self, position, magnitude, timeline, view_range, sweep_item, plot_items, colours, visability):
+        """
+        Description:
+            - Draw one frame in sweep mode: only the samples elapsed since the previous frame are written.
+            - Seeking, rewinding or changing the signals starts a new sweep with the whole window.
+        """
+        head= position + 200
+        window_length= self.sweep_length(timeline.sampling_frequency)
+        if sweep_item.head is None or sweep_item.n_channels != len(magnitude) or sweep_item.window_length != window_length or not 0 < head - sweep_item.head <= window_length:
+            sweep_item.reset(len(magnitude), timeline.sampling_frequency, window_length)
+            view_range.set_x_range(0, timeline.seconds(sweep_item.window_length))
+            start= head - sweep_item.window_length
         else:
-            self.horizontalSlider_2.setValue(int(self.plot_updater2.position * self.horizontalSlider_2.maximum()/ len(self.magnitude_graph2[0])))
+            start= sweep_item.head
+        sweep_item.write(start, [aligned_window(volt, start - offset, head - start) for volt, offset in zip(magnitude, timeline.offsets)])
+        sweep_item.set_style(colours, visability)
+        for index, item in enumerate(plot_items):
+            self.sync_legend_item(item, colours[index], visability[index])
+
+    def set_autoscale(self):
+        """
+        Description:
+            - Switch the y range base between the whole signals and the displayed window (with hysteresis).
+        """
+        self.autoscale= self.checkBox_autoscale.isChecked()
+        self.view_range1.reset_autoscale()
+        self.view_range2.reset_autoscale()
+        if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def sweep_length(self, sampling_frequency):
+        return int(round(self.sweep_window* sampling_frequency))
+
+    def set_sweep_window(self, index):
+        """
+        Description:
+            - Change the length of the sweep, the next frame starts a new sweep with the whole window.
+        """
+        self.sweep_window= SWEEP_WINDOWS[index]
+        if self.sweep_mode:
+            if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+                self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+            if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+                self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def set_sweep_mode(self):
+        """
+        Description:
+            - Switch both graphs between the scrolling window and the fixed sweep with an erase bar.
+        """
+        self.sweep_mode= self.checkBox_sweep.isChecked()
+        for plot, sweep_item, batched_item, items in ((self.widget_plot, self.sweep_traces1, self.batched_curves1, self.plot_items_graph1), (self.widget_2_plot, self.sweep_traces2, self.batched_curves2, self.plot_items_graph2)):
+            sweep_item.reset()
+            if self.sweep_mode:
+                plot.addItem(sweep_item)
+                batched_item.clear()
+                for item in items:
+                    item.setData([], [])
+            else:
+                plot.removeItem(sweep_item)
+        if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def set_batched_rendering(self):
+        """
+        Description:
+            - Switch both graphs between one PlotDataItem per channel and a single batched item per graph.
+        """
+        self.batched_rendering= self.checkBox_batched.isChecked()
+        for plot, batched_item, items in ((self.widget_plot, self.batched_curves1, self.plot_items_graph1), (self.widget_2_plot, self.batched_curves2, self.plot_items_graph2)):
+            if self.batched_rendering:
+                plot.addItem(batched_item)
+                for item in items:
+                    item.setData([], [])
+            else:
+                batched_item.clear()
+                plot.removeItem(batched_item)
+        if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def update_scrolling_slider_value(self, flag, timeline):
+        if flag:
+            self.horizontalSlider.setValue(int(self.plot_updater1.position * self.horizontalSlider.maximum()/ timeline.length))
+        else:
+            self.horizontalSlider_2.setValue(int(self.plot_updater2.position * self.horizontalSlider_2.maximum()/ timeline.length))
 
     #scroll the signal, forward and backward
     def update_plotting_interval(self, flag):
+        if flag:
+            position= int(self.horizontalSlider.value() * self.timeline(True).length/self.horizontalSlider.maximum())
+        else:
+            position= int(self.horizontalSlider_2.value() * self.timeline(False).length/self.horizontalSlider_2.maximum())
         if self.checkBox_link.isChecked():
-            if flag:
-                if int(self.horizontalSlider.value() * len(self.magnitude_graph1[0])/self.horizontalSlider.maximum()) < self.max_pos1:
-                    self.plot_updater1.set_position(int(self.horizontalSlider.value() * len(self.magnitude_graph1[0])/self.horizontalSlider.maximum()))  
-                    self.plot_updater2.set_position(int(self.horizontalSlider.value() * len(self.magnitude_graph2[0])/self.horizontalSlider.maximum()))  
-            else:
-                if int(self.horizontalSlider_2.value() * len(self.magnitude_graph2[0])/self.horizontalSlider_2.maximum()) < self.max_pos2:
-                    self.plot_updater1.set_position(int(self.horizontalSlider_2.value() * len(self.magnitude_graph1[0])/self.horizontalSlider_2.maximum()))  
-                    self.plot_updater2.set_position(int(self.horizontalSlider_2.value() * len(self.magnitude_graph2[0])/self.horizontalSlider_2.maximum()))  
+            # linked graphs share the timeline origin, so both go to the same wall-clock position (in samples of their own rate)
+            if position < (self.max_pos1 if flag else self.max_pos2):
+                seconds= self.timeline(flag).seconds(position)
+                self.plot_updater1.set_position(self.timeline(True).to_position(seconds))
+                self.plot_updater2.set_position(self.timeline(False).to_position(seconds))
             if self.pause_graph1.text() == "Resume":
-                self.get_and_plot_data_in_graph1(int(self.horizontalSlider.value() * len(self.magnitude_graph1[0])/self.horizontalSlider.maximum()))
-                self.get_and_plot_data_in_graph2(int(self.horizontalSlider_2.value() * len(self.magnitude_graph2[0])/self.horizontalSlider_2.maximum()))
+                self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+                self.get_and_plot_data_in_graph2(self.plot_updater2.position)
             else:
                 self.plot_updater1.start()
                 self.plot_updater2.start()
         if flag:
-            if int(self.horizontalSlider.value() * len(self.magnitude_graph1[0])/self.horizontalSlider.maximum()) < self.max_pos1:
-                self.plot_updater1.set_position(int(self.horizontalSlider.value() * len(self.magnitude_graph1[0])/self.horizontalSlider.maximum()))  
+            if position < self.max_pos1:
+                self.plot_updater1.set_position(position)  
                 if self.pause_graph1.text() == "Resume":
-                    self.get_and_plot_data_in_graph1(int(self.horizontalSlider.value() * len(self.magnitude_graph1[0])/self.horizontalSlider.maximum()))
+                    self.get_and_plot_data_in_graph1(position)
             if self.pause_graph1.text() == "Pause":
                 self.plot_updater1.start()
         else:
-            if int(self.horizontalSlider_2.value() * len(self.magnitude_graph2[0])/self.horizontalSlider_2.maximum()) < self.max_pos2:
-                self.plot_updater2.set_position(int(self.horizontalSlider_2.value() * len(self.magnitude_graph2[0])/self.horizontalSlider_2.maximum()))  
+            if position < self.max_pos2:
+                self.plot_updater2.set_position(position)  
                 if self.pause_graph2.text() == "Resume":
-                    self.get_and_plot_data_in_graph2(int(self.horizontalSlider_2.value() * len(self.magnitude_graph2[0])/self.horizontalSlider_2.maximum()))
+                    self.get_and_plot_data_in_graph2(position)
             if self.pause_graph2.text() == "Pause":
                 self.plot_updater2.start()
             
@@ -659,9 +1494,9 @@ class Ui_MainWindow(object):
         if self.checkBox_link.isChecked():
             self.plot_updater2.set_position(0)
             self.plot_updater1.set_position(0)
-        if self.pause_graph1.text() == "Resume":
-            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
-            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+            if self.pause_graph1.text() == "Resume":
+                self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+                self.get_and_plot_data_in_graph2(self.plot_updater2.position)
         else:
             if flag:
                 self.plot_updater1.set_position(0)
@@ -677,17 +1512,17 @@ class Ui_MainWindow(object):
             self.scale_factor_graph1 *=3/4
             self.scale_factor_graph2 *= 3/4
             if self.pause_graph1.text() == "Resume" or self.pause_graph2.text() == "Resume" :
-                self.widget.setYRange(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
-                self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+                self.view_range1.set_y_range(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
+                self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
         else:
             if flag:
                 self.scale_factor_graph1*= 3/4
                 if self.pause_graph1.text() == "Resume":
-                    self.widget.setYRange(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
+                    self.view_range1.set_y_range(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
             else:
                 self.scale_factor_graph2 *= 3/4
                 if self.pause_graph2.text() == "Resume":
-                    self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+                    self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
 
 
     def zoom_out(self, flag):
@@ -695,48 +1530,27 @@ class Ui_MainWindow(object):
             self.scale_factor_graph1 *=5/4
             self.scale_factor_graph2 *= 5/4
             if self.pause_graph1.text() == "Resume" or self.pause_graph2.text() == "Resume" :
-                self.widget.setYRange(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
-                self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+                self.view_range1.set_y_range(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
+                self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
         else:
             if flag:
                 self.scale_factor_graph1*= 5/4
                 if self.pause_graph1.text() == "Resume":
-                    self.widget.setYRange(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 + self.panning_offset1)
+                    self.view_range1.set_y_range(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 + self.panning_offset1)
             else:
                 self.scale_factor_graph2 *= 5/4
                 if self.pause_graph2.text() == "Resume":
-                    self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+                    self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
 
             
     def control_plotting_speed(self, index, flag):
-        if index == 0:   #0.5x
-            if self.checkBox_link.isChecked():
-                self.set_linked_speed(300, index)
-            elif flag:
-                self.set_speed_graph1(300)  
-            else:
-                self.set_speed_graph2(300)
-        elif index == 1 :     #1x
-            if self.checkBox_link.isChecked():
-                self.set_linked_speed(200, index)
-            elif flag:
-                self.set_speed_graph1(200) 
-            else:
-                self.set_speed_graph2(200)
-        elif index == 2 :   #1.5x
-            if self.checkBox_link.isChecked():
-                self.set_linked_speed(100, index)
-            elif flag:
-                self.set_speed_graph1(100) 
-            else:
-                self.set_speed_graph2(100)
-        elif index == 3 :     #2x
-            if self.checkBox_link.isChecked():
-                self.set_linked_speed(50, index)
-            elif flag:
-                self.set_speed_graph1(50) 
-            else:
-                self.set_speed_graph2(50)
+        speed= SPEED_INTERVALS[index]
+        if self.checkBox_link.isChecked():
+            self.set_linked_speed(speed, index)
+        elif flag:
+            self.set_speed_graph1(speed)
+        else:
+            self.set_speed_graph2(speed)
 
     def set_linked_speed(self, speed, index):
         self.comboBox_speed_graph2.setCurrentIndex(index)
@@ -753,9 +1567,10 @@ class Ui_MainWindow(object):
         self.plot_updater2.start()
 
     def link(self):
+        self.set_playback_steps()
         self.scale_factor_graph2= self.scale_factor_graph1
         if self.pause_graph2.text() == "Resume":
-           self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+           self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
         self.comboBox_speed_graph2.setCurrentIndex(self.comboBox_speed_graph1.currentIndex())
         self.control_plotting_speed(self.comboBox_speed_graph2.currentIndex(),False)
         if self.pause_graph1.text() == "Pause":
@@ -766,6 +1581,18 @@ class Ui_MainWindow(object):
             self.plot_updater2.stop()
             self.plot_updater1.stop()
 
+    def set_playback_steps(self):
+        """
+        Description:
+            - Linked graphs play the same time: graph 2 moves by its rate over the rate of graph 1 samples per update,
+              so graphs at different rates stay aligned. Unlinked graphs move one sample per update.
+        """
+        step= 1
+        if self.checkBox_link.isChecked():
+            step= self.timeline(False).sampling_frequency/ self.timeline(True).sampling_frequency
+        if step != self.plot_updater2.step:
+            self.plot_updater2.set_step(step)
+
     def control_single_plot(self, flag):
         if flag:
             self.selected_plot_index1 = self.comboBox_signals_graph1.currentData()
@@ -815,7 +1642,7 @@ class Ui_MainWindow(object):
                 if self.max1 *self.scale_factor_graph1 + self.panning_offset1 > self.min1 +0.4 :
                     self.panning_offset1-= 0.05 * abs(self.min1)
             if self.pause_graph1.text() == "Resume":
-                self.widget.setYRange(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
+                self.view_range1.set_y_range(self.minimum1 *self.scale_factor_graph1 + self.panning_offset1, self.maximum1 *self.scale_factor_graph1 +self.panning_offset1 )
                 
         else:
             if text == "up":
@@ -825,7 +1652,7 @@ class Ui_MainWindow(object):
                 if self.max2 *self.scale_factor_graph2 + self.panning_offset2 > self.min2 +0.4:
                     self.panning_offset2-= 0.05 * abs(self.min2)
             if self.pause_graph2.text() == "Resume" :
-                self.widget_2.setYRange(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
+                self.view_range2.set_y_range(self.minimum2 *self.scale_factor_graph2+ self.panning_offset2, self.maximum2 *self.scale_factor_graph2+ self.panning_offset2)
 
     
     def Show_pop_up_window(self, flag):
@@ -850,14 +1677,20 @@ class Ui_MainWindow(object):
                     self.comboBox_signals_graph2.setCurrentText(self.labels2[self.selected_plot_index2])
 
     def Move_signals(self, flag):
+        index, sources= (self.selected_plot_index1, self.sources1) if flag else (self.selected_plot_index2, self.sources2)
+        rate= channel_rate(sources[index], self.sampling_frequency)
+        if not self.accept_sampling_frequency(not flag, rate):
+            self.show_rate_mismatch(not flag, [f"{(self.labels1 if flag else self.labels2)[index]} ({rate:g} Hz)"])
+            return
         if flag:
-            self.add_to_graph(self.magnitude_graph2, self.magnitude_graph1[self.selected_plot_index1], self.plot_items_graph2, self.colours2, self.labels2, self.visability2, self.widget_2_plot,self.labels1[self.selected_plot_index1], self.colours1[self.selected_plot_index1], self.labels1[self.selected_plot_index1], self.visability1[self.selected_plot_index1], self.comboBox_signals_graph2,self.pause_graph2,self.plot_updater2)
-            self.remove_from_graph(self.magnitude_graph1,self.widget_plot, self.plot_items_graph1[self.selected_plot_index1],self.plot_items_graph1, self.labels1, self.colours1, self.visability1,self.comboBox_signals_graph1, self.selected_plot_index1, self.plot_updater1)
+            self.add_to_graph(self.magnitude_graph2, self.magnitude_graph1[self.selected_plot_index1], self.plot_items_graph2, self.colours2, self.labels2, self.visability2, self.widget_2_plot,self.labels1[self.selected_plot_index1], self.colours1[self.selected_plot_index1], self.labels1[self.selected_plot_index1], self.visability1[self.selected_plot_index1], self.sources2, self.sources1[self.selected_plot_index1], self.comboBox_signals_graph2,self.pause_graph2,self.plot_updater2)
+            self.remove_from_graph(self.magnitude_graph1,self.widget_plot, self.plot_items_graph1[self.selected_plot_index1],self.plot_items_graph1, self.labels1, self.colours1, self.visability1, self.sources1,self.comboBox_signals_graph1, self.selected_plot_index1, self.plot_updater1)
         else:
-            self.add_to_graph(self.magnitude_graph1, self.magnitude_graph2[self.selected_plot_index2], self.plot_items_graph1, self.colours1, self.labels1, self.visability1, self.widget_plot,self.labels2[self.selected_plot_index2], self.colours2[self.selected_plot_index2], self.labels2[self.selected_plot_index2], self.visability2[self.selected_plot_index2], self.comboBox_signals_graph1,self.pause_graph1,self.plot_updater1)
-            self.remove_from_graph(self.magnitude_graph2,self.widget_2_plot, self.plot_items_graph2[self.selected_plot_index2],self.plot_items_graph2, self.labels2, self.colours2, self.visability2,self.comboBox_signals_graph2, self.selected_plot_index2, self.plot_updater2)    
+            self.add_to_graph(self.magnitude_graph1, self.magnitude_graph2[self.selected_plot_index2], self.plot_items_graph1, self.colours1, self.labels1, self.visability1, self.widget_plot,self.labels2[self.selected_plot_index2], self.colours2[self.selected_plot_index2], self.labels2[self.selected_plot_index2], self.visability2[self.selected_plot_index2], self.sources1, self.sources2[self.selected_plot_index2], self.comboBox_signals_graph1,self.pause_graph1,self.plot_updater1)
+            self.remove_from_graph(self.magnitude_graph2,self.widget_2_plot, self.plot_items_graph2[self.selected_plot_index2],self.plot_items_graph2, self.labels2, self.colours2, self.visability2, self.sources2,self.comboBox_signals_graph2, self.selected_plot_index2, self.plot_updater2)    
+        self.set_playback_steps()
 
-    def remove_from_graph( self, magnitude,plot_item, item,sig_array, label_array,color_array,visibility_array, combobox, index, updater):
+    def remove_from_graph( self, magnitude,plot_item, item,sig_array, label_array,color_array,visibility_array, source_array, combobox, index, updater):
         magnitude.pop(index)
         if len(magnitude) == 0:
             updater.stop()
@@ -868,18 +1701,20 @@ class Ui_MainWindow(object):
         label_array.pop(index)
         color_array.pop(index)
         visibility_array.pop(index)
+        source_array.pop(index)
         combobox.clear()
         for Combobox_it in range (len(label_array)):
             combobox.addItem( label_array[Combobox_it], userData=Combobox_it)
             combobox.setCurrentIndex(-1)
         
-    def add_to_graph(self, mag_array, mag, sig_array, color_array, label_array, visibility_array, item, name,  color, label, visibility, combobox, button, updater):
+    def add_to_graph(self, mag_array, mag, sig_array, color_array, label_array, visibility_array, item, name,  color, label, visibility, source_array, source, combobox, button, updater):
         mag_array.append(mag)
         widget_curve= item.plot(name= name)
         sig_array.append(widget_curve)
         color_array.append(color)
         label_array.append(label)
         visibility_array.append(visibility)
+        source_array.append(source)
         combobox.clear()
         for Combobox_it in range (len(label_array)):
             combobox.addItem( label_array[Combobox_it], userData=Combobox_it)
@@ -911,12 +1746,196 @@ class Ui_MainWindow(object):
         self.overlay2.showOverlay()
         
 
+    def toggle_server(self):
+        """
+        Description:
+            - Start/stop publishing both graphs to remote viewers, each tick of a graph is sent as it is plotted.
+        """
+        if self.monitor_server is None:
+            from monitor_server import MonitorServer
+            self.monitor_server= MonitorServer()
+            if not self.monitor_server.listen(DEFAULT_MONITOR_PORT):
+                QMessageBox.warning(None, "Monitoring Server", f"Could not listen on port {DEFAULT_MONITOR_PORT}")
+                self.monitor_server= None
+                return
+            self.plot_updater1.update_signal.connect(self.publish_graph1)
+            self.plot_updater2.update_signal.connect(self.publish_graph2)
+            self.server_button.setText("Stop Server")
+        else:
+            self.plot_updater1.update_signal.disconnect(self.publish_graph1)
+            self.plot_updater2.update_signal.disconnect(self.publish_graph2)
+            self.monitor_server.close()
+            self.monitor_server= None
+            self.server_button.setText("Start Server")
+
+    def publish_graph1(self, position):
+        timeline= self.timeline(True)
+        if self.magnitude_graph1 and position <= timeline.length- 200:
+            self.monitor_server.publish_window(0, position, self.magnitude_graph1, self.labels1, timeline.sampling_frequency, offsets=timeline.offsets)
+
+    def publish_graph2(self, position):
+        timeline= self.timeline(False)
+        if self.magnitude_graph2 and position <= timeline.length- 200:
+            self.monitor_server.publish_window(1, position, self.magnitude_graph2, self.labels2, timeline.sampling_frequency, offsets=timeline.offsets)
+
+    def save_session(self):
+        """
+        Description:
+            - Save references to the loaded recordings (path + content hash) and the view state of both graphs.
+        """
+        file_path, _ = QFileDialog.getSaveFileName(None, "Save Session", self.current_directory, "Session Files (*.icusession)")
+        if file_path:
+            write_session(file_path, self.session_state())
+
+    def session_state(self):
+        return {
+            "link": self.checkBox_link.isChecked(),
+            "graphs": [
+                self.graph_state(self.magnitude_graph1, self.labels1, self.colours1, self.visability1, self.sources1, self.scale_factor_graph1, self.panning_offset1, self.plot_updater1, self.comboBox_speed_graph1, self.pause_graph1),
+                self.graph_state(self.magnitude_graph2, self.labels2, self.colours2, self.visability2, self.sources2, self.scale_factor_graph2, self.panning_offset2, self.plot_updater2, self.comboBox_speed_graph2, self.pause_graph2),
+            ],
+        }
+
+    def graph_state(self, magnitude, labels, colours, visability, sources, scale_factor, panning_offset, plot_updater, combobox_speed, pause_button):
+        signals= []
+        for samples, label, colour, visible, source in zip(magnitude, labels, colours, visability, sources):
+            # CSV signals are written once to the binary cache so the restore does not parse them again
+            cache_source(source, samples)
+            signals.append({"source": source, "label": label, "colour": colour, "visible": visible})
+        return {
+            "signals": signals,
+            "scale_factor": scale_factor,
+            "panning_offset": panning_offset,
+            "position": plot_updater.position,
+            "speed_index": combobox_speed.currentIndex(),
+            "paused": pause_button.text() == "Resume",
+        }
+
+    def load_session(self):
+        file_path, _ = QFileDialog.getOpenFileName(None, "Load Session", self.current_directory, "Session Files (*.icusession)")
+        if file_path:
+            try:
+                self.restore_session(read_session(file_path))
+            except (OSError, ValueError, KeyError) as error:
+                QMessageBox.warning(None, "Load Session", f"Could not restore the session: {error}")
+
+    def restore_session(self, state):
+        """
+        Description:
+            - Replace the current graphs with the ones of a saved session.
+            - Recordings are re-attached lazily (memory-mapped cache or binary reader), nothing is decoded until the first frame.
+        """
+        self.clear_graph(True)
+        self.clear_graph(False)
+        self.checkBox_link.setChecked(state["link"])
+        graph1, graph2 = state["graphs"]
+        records= {}
+        self.restore_graph(True, graph1, records, self.colours1, self.visability1, self.plot_updater1, self.comboBox_speed_graph1, self.pause_graph1)
+        self.restore_graph(False, graph2, records, self.colours2, self.visability2, self.plot_updater2, self.comboBox_speed_graph2, self.pause_graph2)
+        self.scale_factor_graph1, self.panning_offset1 = graph1["scale_factor"], graph1["panning_offset"]
+        self.scale_factor_graph2, self.panning_offset2 = graph2["scale_factor"], graph2["panning_offset"]
+        self.max_pos1, self.max_pos2 = graph1["position"], graph2["position"]
+        if self.magnitude_graph1 and graph1["paused"]:
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and graph2["paused"]:
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
+    def restore_graph(self, flag, graph, records, colours, visability, plot_updater, combobox_speed, pause_button):
+        pause_button.setText("Resume" if graph["paused"] else "Pause")
+        combobox_speed.setCurrentIndex(graph["speed_index"])
+        plot_updater.set_update_interval(SPEED_INTERVALS[graph["speed_index"]])
+        plot_updater.set_position(graph["position"])
+        refused= []
+        for signal in graph["signals"]:
+            samples, sampling_frequency = open_source(signal["source"], records)
+            if not self.accept_sampling_frequency(flag, sampling_frequency):
+                refused.append(f"{signal['label']} ({sampling_frequency:g} Hz)")
+                continue
+            self.add_signal(flag, samples, signal["label"], signal["source"])
+            colours[-1]= signal["colour"]
+            visability[-1]= signal["visible"]
+        if refused:
+            self.show_rate_mismatch(flag, refused)
+
+    def clear_graph(self, flag):
+        if flag:
+            self.remove_all_signals(self.magnitude_graph1, self.widget_plot, self.plot_items_graph1, self.labels1, self.colours1, self.visability1, self.sources1, self.comboBox_signals_graph1, self.plot_updater1)
+            self.batched_curves1.clear()
+            self.sweep_traces1.reset()
+            self.max_pos1= 0
+            self.annotations_item1.set_spans([])
+            self.quality_item1.set_spans([])
+            if self.spectrogram_panel1 is not None:
+                self.spectrogram_panel1.clear()
+        else:
+            self.remove_all_signals(self.magnitude_graph2, self.widget_2_plot, self.plot_items_graph2, self.labels2, self.colours2, self.visability2, self.sources2, self.comboBox_signals_graph2, self.plot_updater2)
+            self.batched_curves2.clear()
+            self.sweep_traces2.reset()
+            self.max_pos2= 0
+            self.annotations_item2.set_spans([])
+            self.quality_item2.set_spans([])
+            if self.spectrogram_panel2 is not None:
+                self.spectrogram_panel2.clear()
+        self.set_playback_steps()
+
+    def remove_all_signals(self, magnitude, plot_item, sig_array, label_array, color_array, visibility_array, source_array, combobox, updater):
+        updater.stop()
+        updater.set_position(0)
+        for samples in magnitude:
+            self.memory.release(samples)
+        for item in sig_array:
+            plot_item.removeItem(item)
+            plot_item.legend.removeItem(item)
+        for array in (magnitude, sig_array, label_array, color_array, visibility_array, source_array):
+            array.clear()
+        combobox.clear()
+
+    def remove_old_snapshots(self):
+        image_files = [file for file in os.listdir(self.current_directory) if file.lower().endswith(('.png', '.jpg', '.jpeg'))]
+        # if there was a snapshots taken from thre previous run of the program left with the script in the same folder delete them (the copy in the folder previous snapshots wont be removed)
+        for image_file in image_files:
+            snapshot_path = os.path.join(self.current_directory, image_file)
+            os.remove(snapshot_path)
+
+    def set_quality_shading(self):
+        """
+        Description:
+            - Show/hide the shading of the parts of the signals with poor quality.
+        """
+        if self.magnitude_graph1 and self.pause_graph1.text() == "Resume":
+            self.get_and_plot_data_in_graph1(self.plot_updater1.position)
+        if self.magnitude_graph2 and self.pause_graph2.text() == "Resume":
+            self.get_and_plot_data_in_graph2(self.plot_updater2.position)
+
     def make_the_report(self):
         
         file_path, _ = QFileDialog.getSaveFileName(None, "Save Report", self.current_directory, "PDF Files (*.pdf)")
         
         # Check if the user selected a path
         if file_path:
+            self.report_path= file_path
+            self.write_report_when_scored()
+
+    def write_report_when_scored(self):
+        """
+        Description:
+            - Write the requested report once the quality maps of all the displayed signals are scored, the
+              statistics table is built from them.
+        """
+        if any(quality_map(samples) is None for samples in self.magnitude_graph1 + self.magnitude_graph2):
+            return
+        file_path= self.report_path
+        self.report_path= None
+        self.write_report(file_path)
+
+    def write_report(self, file_path):
+        if file_path:
+            # reportlab is only loaded the first time a report is made, it is a large part of the startup time
+            from reportlab.lib.pagesizes import letter
+            from reportlab.lib import colors
+            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Spacer, Paragraph
+            from reportlab.platypus.flowables import KeepTogether
+            from reportlab.lib.styles import getSampleStyleSheet
             doc = SimpleDocTemplate(file_path, pagesize=letter)  # Create a PDF document
 
             # Define the content for the PDF report
@@ -935,26 +1954,31 @@ class Ui_MainWindow(object):
             time = Paragraph(f"Time: {current_time.split()[1]}", normal_style)  # Extract the time
             content.extend([title, Spacer(0, 50), Spacer(1, 12), date,Spacer(1,10) ,time, Spacer(1, 30)])
             # Add a table with data statistics
-            data = [["Signal", "Mean", "Std", "Duration", "Min", "Max"]]
+            # the statistics leave out the flat, clipped, noisy and missing parts of each signal
+            data = [["Signal", "Mean", "Std", "Duration", "Min", "Max", "Excluded (s)"]]
             for i in range(len(self.labels1)):
+                statistics = quality_map(self.magnitude_graph1[i]).statistics()
                 signal_stats = [
                     self.labels1[i] + f"(Graph 1)",
-                    np.mean(self.magnitude_graph1[i]),
-                    np.std(self.magnitude_graph1[i]),
-                    len(self.magnitude_graph1[i]) / self.sampling_frequency,
-                    np.min(self.magnitude_graph1[i]),
-                    np.max(self.magnitude_graph1[i]),
+                    statistics.mean,
+                    statistics.std,
+                    len(self.magnitude_graph1[i]) / channel_rate(self.sources1[i], self.sampling_frequency),
+                    statistics.minimum,
+                    statistics.maximum,
+                    statistics.excluded / channel_rate(self.sources1[i], self.sampling_frequency),
                 ]
                 data.append(signal_stats)
 
             for i in range(len(self.labels2)):
+                statistics = quality_map(self.magnitude_graph2[i]).statistics()
                 signal_stats = [
                     self.labels2[i]  + f"(Graph 2)",
-                    np.mean(self.magnitude_graph2[i]),
-                    np.std(self.magnitude_graph2[i]),
-                    len(self.magnitude_graph2[i]) / self.sampling_frequency,
-                    np.min(self.magnitude_graph2[i]),
-                    np.max(self.magnitude_graph2[i]),
+                    statistics.mean,
+                    statistics.std,
+                    len(self.magnitude_graph2[i]) / channel_rate(self.sources2[i], self.sampling_frequency),
+                    statistics.minimum,
+                    statistics.maximum,
+                    statistics.excluded / channel_rate(self.sources2[i], self.sampling_frequency),
                 ]
                 data.append(signal_stats)
             table = Table(data)
@@ -967,6 +1991,20 @@ class Ui_MainWindow(object):
                                     ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
                                     ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
             content.append(table)
+            annotations_data = [["Signal", "Kind", "Start (s)", "End (s)", "Text"]]
+            for labels, sources, graph in ((self.labels1, self.sources1, "Graph 1"), (self.labels2, self.sources2, "Graph 2")):
+                for label, source in zip(labels, sources):
+                    for annotation in self.annotations.index_for(source):
+                        annotations_data.append([f"{label}({graph})", annotation.kind, f"{annotation.start:.2f}", f"{annotation.end:.2f}", annotation.text])
+            if len(annotations_data) > 1:
+                annotations_table = Table(annotations_data)
+                annotations_table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+                                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                                        ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
+                content.extend([Spacer(1, 30), Paragraph("Annotations", styles["Heading2"]), annotations_table])
             content.append(Spacer(1, 30))  # Add some spacing between the table and the snapshots
             snapshot_folder= self.current_directory
             # Find all image files in the snapshot folder
@@ -1001,6 +2039,7 @@ class Ui_MainWindow(object):
         self.zoom_in_graph1.setText(_translate("MainWindow", "Zoom In"))
         self.zoom_out_graph1.setText(_translate("MainWindow", "Zoom Out"))
         self.rewind_graph1.setText(_translate("MainWindow", "Rewind"))
+        self.clear_graph1.setText(_translate("MainWindow", "Clear"))
         self.label_4.setText(_translate("MainWindow", "Speed"))
         self.label_signal.setText(_translate("MainWindow", "Signal"))
         self.label_signal2.setText(_translate("MainWindow", "Signal"))
@@ -1017,12 +2056,16 @@ class Ui_MainWindow(object):
         self.comboBox_colors_graph1.setItemText(5, _translate("MainWindow", "Brown"))
         self.checkBox_show_graph1.setText(_translate("MainWindow", "Show"))
         self.addlabel_button1.setText(_translate("MainWindow", "Add a Label"))
+        self.annotate_button1.setText(_translate("MainWindow", "Annotate"))
+        self.start_time_button1.setText(_translate("MainWindow", "Start Time"))
         self.pushButton.setText(_translate("MainWindow", "Move to Graph2"))
         self.save_photo_graph1.setText(_translate("MainWindow", "Save Photo"))
+        self.search_button1.setText(_translate("MainWindow", "Find Similar"))
         self.pause_graph2.setText(_translate("MainWindow", "Pause"))
         self.zoom_in_graph2.setText(_translate("MainWindow", "Zoom In"))
         self.zoom_out_graph2.setText(_translate("MainWindow", "Zoom Out"))
         self.rewind_graph2.setText(_translate("MainWindow", "Rewind"))
+        self.clear_graph2.setText(_translate("MainWindow", "Clear"))
         self.label_3.setText(_translate("MainWindow", "Speed"))
         self.comboBox_speed_graph2.setItemText(0, _translate("MainWindow", "0.5x"))
         self.comboBox_speed_graph2.setItemText(1, _translate("MainWindow", "1x"))
@@ -1037,10 +2080,25 @@ class Ui_MainWindow(object):
         self.comboBox_colors_graph2.setItemText(5, _translate("MainWindow", "Brown"))
         self.checkBox_show_graph2.setText(_translate("MainWindow", "Show"))
         self.addlabel_button2.setText(_translate("MainWindow", "Add a Label"))
+        self.annotate_button2.setText(_translate("MainWindow", "Annotate"))
+        self.start_time_button2.setText(_translate("MainWindow", "Start Time"))
         self.pushButton_2.setText(_translate("MainWindow", "Move to Graph1"))
         self.save_photo_graph2.setText(_translate("MainWindow", "Save Photo"))
+        self.search_button2.setText(_translate("MainWindow", "Find Similar"))
         self.checkBox_link.setText(_translate("MainWindow", "Link the Two Graphs"))
+        self.checkBox_batched.setText(_translate("MainWindow", "Batched Rendering"))
+        self.checkBox_sweep.setText(_translate("MainWindow", "Sweep Mode"))
+        for index, seconds in enumerate(SWEEP_WINDOWS):
+            self.comboBox_sweep_window.setItemText(index, _translate("MainWindow", f"{seconds:g} s sweep"))
+        self.checkBox_autoscale.setText(_translate("MainWindow", "Auto Scale"))
+        self.checkBox_spectrogram.setText(_translate("MainWindow", "Spectrogram"))
+        self.checkBox_quality.setText(_translate("MainWindow", "Signal Quality"))
         self.make_report.setText(_translate("MainWindow", "Make a Report"))
+        self.save_session_button.setText(_translate("MainWindow", "Save Session"))
+        self.memory_button.setText(_translate("MainWindow", "Memory"))
+        self.export_button.setText(_translate("MainWindow", "Export Range"))
+        self.server_button.setText(_translate("MainWindow", "Start Server"))
+        self.load_session_button.setText(_translate("MainWindow", "Load Session"))
         self.actionNew.setText(_translate("MainWindow", "New"))
         self.action_upload_in_Graph_1.setText(_translate("MainWindow", "Graph 1"))
         self.action_upload_in_Graph_2.setText(_translate("MainWindow", "Graph 2"))
@@ -1062,4 +2120,9 @@ if __name__ == "__main__":
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
     MainWindow.show()
+    app.aboutToQuit.connect(ui.workers.shutdown)
+    if os.environ.get("ICU_MONITOR_STATS"):
+        # cache hit/miss counters and sizes are logged on exit
+        logging.basicConfig(level=logging.INFO)
+        app.aboutToQuit.connect(instrumentation.log_snapshot)
     sys.exit(app.exec_())
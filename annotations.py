@@ -0,0 +1,117 @@
+import bisect
+import heapq
+import json
+import math
+import os
+from collections import namedtuple
+
+ANNOTATION_KINDS = ("Alarm", "Beat", "Note", "Artifact")
+
+# start/end in seconds from the beginning of the recording, end == start for a point event
+Annotation = namedtuple("Annotation", "start end kind text")
+
+
+class AnnotationIndex(object):
+    """
+    Description:
+        - Annotations of one channel, grouped by duration class: a class holds the annotations lasting less than
+          2 ** class seconds (point events have their own class), each kept sorted by start time.
+        - A query bisects every class from t0 minus that class's bound, so one long interval (a 24 h monitoring
+          span) never makes the short events before the viewport part of the scan: O(log n + k) per class.
+    """
+
+    def __init__(self, annotations=()):
+        self._classes = {}
+        self._length = 0
+        for annotation in annotations:
+            self.add(annotation)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return heapq.merge(*(annotations for _, annotations in self._classes.values()), key=lambda annotation: annotation.start)
+
+    @staticmethod
+    def _duration_class(annotation):
+        duration = annotation.end - annotation.start
+        return math.frexp(duration)[1] if duration > 0 else None
+
+    def add(self, annotation):
+        starts, annotations = self._classes.setdefault(self._duration_class(annotation), ([], []))
+        position = bisect.bisect_right(starts, annotation.start)
+        starts.insert(position, annotation.start)
+        annotations.insert(position, annotation)
+        self._length += 1
+
+    def remove(self, annotation):
+        duration_class = self._duration_class(annotation)
+        starts, annotations = self._classes[duration_class]
+        position = annotations.index(annotation)
+        del starts[position]
+        del annotations[position]
+        self._length -= 1
+        if not annotations:
+            del self._classes[duration_class]
+
+    def query(self, start, end):
+        """
+        Description:
+            - Annotations overlapping the time range [start, end], by start time.
+        """
+        found = []
+        for duration_class, (starts, annotations) in self._classes.items():
+            longest = math.ldexp(1.0, duration_class) if duration_class is not None else 0.0
+            first = bisect.bisect_left(starts, start - longest)
+            last = bisect.bisect_right(starts, end)
+            found.extend(annotation for annotation in annotations[first:last] if annotation.end >= start)
+        if len(self._classes) > 1:
+            found.sort(key=lambda annotation: annotation.start)
+        return found
+
+
+def sidecar_path(recording_path):
+    return recording_path + ".annotations.json"
+
+
+class AnnotationStore(object):
+    """
+    Description:
+        - Annotation indexes of every loaded channel, keyed by the channel source (recording path + channel).
+        - They persist in a JSON file next to the recording, read the first time one of its channels is used.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._loaded = set()
+        self._empty = AnnotationIndex()
+
+    @staticmethod
+    def key(source):
+        return f"{source['path']}#{source['channel']}"
+
+    def index_for(self, source):
+        if source is None:
+            return self._empty
+        key = self.key(source)
+        if key not in self._indexes:
+            self.load(source["path"])
+            self._indexes.setdefault(key, AnnotationIndex())
+        return self._indexes[key]
+
+    def load(self, recording_path):
+        if recording_path in self._loaded:
+            return
+        self._loaded.add(recording_path)
+        path = sidecar_path(recording_path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as sidecar:
+                for channel, annotations in json.load(sidecar).items():
+                    self._indexes[f"{recording_path}#{channel}"] = AnnotationIndex(Annotation(*annotation) for annotation in annotations)
+
+    def save(self, recording_path):
+        prefix = recording_path + "#"
+        channels = {key[len(prefix):]: [list(annotation) for annotation in index]
+                    for key, index in self._indexes.items() if key.startswith(prefix) and len(index)}
+        with open(sidecar_path(recording_path), "w", encoding="utf-8") as sidecar:
+            json.dump(channels, sidecar, separators=(",", ":"))
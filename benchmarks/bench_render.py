@@ -0,0 +1,90 @@
+"""
+Description:
+    - Frame time of the per-item render path (one PlotDataItem per channel) against the batched item.
+    - Runs offscreen: python benchmarks/bench_render.py [--channels 8 32 64] [--frames 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtGui, QtWidgets
+
+from render_backends import BatchedCurvesItem
+
+WINDOW = 200
+SAMPLING_FREQUENCY = 125
+COLOURS = ("red", "green", "blue", "yellow")
+
+
+def render(widget):
+    image = QtGui.QImage(widget.size(), QtGui.QImage.Format_ARGB32)
+    painter = QtGui.QPainter(image)
+    widget.render(painter)
+    painter.end()
+
+
+def make_signals(n_channels, n_samples=20000):
+    t = np.arange(n_samples) / SAMPLING_FREQUENCY
+    return [np.sin(2 * np.pi * (1 + channel * 0.1) * t) + channel for channel in range(n_channels)]
+
+
+def frame_axis(position):
+    return np.linspace(position / SAMPLING_FREQUENCY, (position + WINDOW) / SAMPLING_FREQUENCY, WINDOW)
+
+
+def bench_per_item(signals, frames):
+    widget = pg.PlotWidget()
+    widget.resize(800, 400)
+    items = [widget.plot() for _ in signals]
+    colours = [COLOURS[i % len(COLOURS)] for i in range(len(signals))]
+    start = time.perf_counter()
+    for position in range(frames):
+        x_values = frame_axis(position)
+        for item, signal, colour in zip(items, signals, colours):
+            item.setData(x_values, signal[position: position + WINDOW])
+            item.setPen(colour)
+            item.setVisible(True)
+        widget.setXRange(x_values[0], x_values[-1])
+        render(widget)
+    return (time.perf_counter() - start) / frames
+
+
+def bench_batched(signals, frames):
+    widget = pg.PlotWidget()
+    widget.resize(800, 400)
+    batched = BatchedCurvesItem()
+    widget.addItem(batched)
+    colours = [COLOURS[i % len(COLOURS)] for i in range(len(signals))]
+    visibility = [True] * len(signals)
+    start = time.perf_counter()
+    for position in range(frames):
+        x_values = frame_axis(position)
+        batched.set_curves(x_values, [signal[position: position + WINDOW] for signal in signals], colours, visibility)
+        widget.setXRange(x_values[0], x_values[-1])
+        render(widget)
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--channels", type=int, nargs="+", default=[4, 16, 32, 64])
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    print(f"{'channels':>8} {'per-item ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for n_channels in args.channels:
+        signals = make_signals(n_channels)
+        per_item = bench_per_item(signals, args.frames)
+        batched = bench_batched(signals, args.frames)
+        print(f"{n_channels:>8} {per_item * 1e3:>12.2f} {batched * 1e3:>11.2f} {per_item / batched:>7.1f}x")
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
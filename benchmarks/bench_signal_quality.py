@@ -0,0 +1,130 @@
+"""
+Description:
+    - Signal quality scoring time per hour of recording, and a regression check of the clipping and flatline
+      detection: clean quasi-periodic signals (ECG resting on its baseline, capnography resting on its floor) must
+      keep more than 99 % of their samples, the same signals pushed into a rail must be flagged as clipped and a
+      pressure dropping out must be flagged as flat. Exits with 1 on any failure.
+    - python benchmarks/bench_signal_quality.py [--hours 1] [--sampling-frequencies 125 360]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from signal_quality import CLIPPING, FLATLINE, QualityMap, longest_runs, rate_chunk_size
+
+
+def beat_times(seconds, rate, rng):
+    # quasi-periodic: the interval between beats wanders around 60 / rate seconds
+    intervals = 60 / rate * (1 + 0.05 * rng.standard_normal(int(seconds * rate / 60) + 2))
+    return np.cumsum(intervals) - intervals[0]
+
+
+def ecg(t, rng, s_wave=True):
+    # P, Q, R, S and T waves as gaussians (offset s, amplitude mV, width s) around every beat
+    waves = [(-0.2, 0.15, 0.025), (-0.05, -0.1, 0.01), (0, 1.0, 0.012), (0.05, -0.25, 0.01), (0.3, 0.3, 0.05)]
+    if not s_wave:
+        waves = [(offset, amplitude, width) for offset, amplitude, width in waves if amplitude > 0]
+    signal = np.zeros(len(t))
+    for beat in beat_times(t[-1] + 1, 72, rng):
+        near = slice(*np.searchsorted(t, [beat - 0.6, beat + 0.6]))
+        for offset, amplitude, width in waves:
+            signal[near] += amplitude * np.exp(-((t[near] - beat - offset) / width) ** 2 / 2)
+    return signal
+
+
+def capnography(t, rng):
+    # a plateau rising to the end-tidal CO2 (around 38 mmHg) every breath, on whole mmHg like a monitor output
+    signal = np.zeros(len(t))
+    for breath in beat_times(t[-1] + 1, 15, rng):
+        near = slice(*np.searchsorted(t, [breath, breath + 2.0]))
+        height = 38 + 1.5 * rng.standard_normal()
+        signal[near] += np.interp(t[near] - breath, [0, 0.3, 1.8, 2.0], [0, height - 3, height, 0])
+    return np.round(signal)
+
+
+def arterial_pressure(t, rng):
+    # a systolic upstroke and diastolic decay between 80 and 120 mmHg every beat, on whole mmHg
+    signal = np.full(len(t), 80.0)
+    for beat in beat_times(t[-1] + 1, 72, rng):
+        near = slice(*np.searchsorted(t, [beat, beat + 0.8]))
+        signal[near] += np.interp(t[near] - beat, [0, 0.1, 0.3, 0.8], [0, 40, 25, 0])
+    return np.round(signal)
+
+
+def dropouts(signal, t, level, seconds, every=600):
+    # the transducer disconnected for `seconds` every `every` seconds, the monitor holding `level`
+    dropped = signal.copy()
+    dropped[(t % every) < seconds] = level
+    return dropped
+
+
+def signals(t, rng):
+    # name: (clean signal, the same signal clipped by the amplifier or None)
+    clean = ecg(t, rng)
+    sine = np.sin(2 * np.pi * 0.25 * t)
+    return {
+        "ecg, baseline at the minimum": (np.round(ecg(t, rng, s_wave=False) * 200) / 200, None),
+        "ecg, noise and 5 uV steps": (np.round((clean + 0.01 * rng.standard_normal(len(t))) * 200) / 200, None),
+        "capnography": (capnography(t, rng), None),
+        "arterial pressure": (arterial_pressure(t, rng), None),
+        "ecg, R peaks at the rail": (clean, np.minimum(clean, 0.5)),
+        "sine, troughs at the rail": (sine, np.maximum(sine, -0.9)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=1)
+    parser.add_argument("--sampling-frequencies", type=float, nargs="+", default=[125, 360])
+    args = parser.parse_args()
+    failures = []
+    print(f"{'fs':>6} {'signal':<30} {'s / hour':>9} {'clipped %':>10} {'excluded %':>11}")
+    for sampling_frequency in args.sampling_frequencies:
+        rng = np.random.default_rng(0)
+        chunk_size = rate_chunk_size(sampling_frequency)
+        t = np.arange(int(args.hours * 3600 * sampling_frequency) // chunk_size * chunk_size) / sampling_frequency
+        for name, (clean, clipped) in signals(t, rng).items():
+            samples = clean if clipped is None else clipped
+            start = time.perf_counter()
+            quality = QualityMap.from_samples(samples, chunk_size)
+            statistics = quality.statistics()
+            elapsed = time.perf_counter() - start
+            found = quality.chunk_flags() & CLIPPING != 0
+            print(f"{sampling_frequency:>6.0f} {name:<30} {elapsed / args.hours:>9.3f} {100 * found.mean():>10.1f} "
+                  f"{100 * statistics.excluded / len(samples):>11.1f}")
+            where = f"{name} at {sampling_frequency:g} Hz"
+            if clipped is None:
+                if found.any() or np.isnan(statistics.mean):
+                    failures.append(f"{where}: {found.sum()} chunks of a clean signal flagged as clipped, mean {statistics.mean}")
+                if statistics.excluded > 0.01 * len(samples):
+                    failures.append(f"{where}: {100 * statistics.excluded / len(samples):.1f} % of a clean signal excluded")
+                continue
+            # every chunk with a run of clipped samples is found, and nothing where the amplifier did not clip
+            changed = (clean != clipped).reshape(-1, chunk_size)
+            missed = (longest_runs(changed) >= quality.clip_run) & ~found
+            wrong = found & ~changed.any(axis=1)
+            if missed.any() or wrong.any():
+                failures.append(f"{where}: {missed.sum()} clipped chunks missed, {wrong.sum()} clean chunks flagged")
+        # a pressure dropping to 0 for 5 s is flat, a lead off for 20 s is flat at any level
+        for name, level, seconds in (("pressure at 0 for 5 s", 0, 5), ("pressure held at 100 for 20 s", 100, 20)):
+            pressure = arterial_pressure(t, rng)
+            quality = QualityMap.from_samples(dropouts(pressure, t, level, seconds), chunk_size)
+            found = quality.chunk_flags() & FLATLINE != 0
+            dropped = dropouts(pressure, t, np.nan, seconds).reshape(-1, chunk_size)
+            whole = np.isnan(dropped).all(axis=1)
+            print(f"{sampling_frequency:>6.0f} {name:<30} {'':>9} {'':>10} {100 * found.mean():>11.1f}")
+            if (whole & ~found).any() or (found & ~np.isnan(dropped).any(axis=1)).any():
+                failures.append(f"{name} at {sampling_frequency:g} Hz: {(whole & ~found).sum()} flat chunks missed, "
+                                f"{(found & ~np.isnan(dropped).any(axis=1)).sum()} chunks with signal flagged")
+    for failure in failures:
+        print("FAIL", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Description:
+    - Cold start: import time of the heaviest modules (python -X importtime) and time to the first paint of the window.
+    - python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs in a fresh interpreter so every import is cold
+CHILD = """
+import time
+start = time.perf_counter()
+import sys
+sys.path.insert(0, {directory!r})
+from PyQt5 import QtCore, QtWidgets
+import ICU_monitor
+imported = time.perf_counter()
+app = QtWidgets.QApplication(sys.argv)
+
+
+class FirstPaint(QtCore.QObject):
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Paint:
+            print(f"RESULT {{imported - start}} {{time.perf_counter() - start}} {{'reportlab' in sys.modules}} {{'pandas' in sys.modules}}")
+            app.quit()
+        return False
+
+
+window = QtWidgets.QMainWindow()
+ui = ICU_monitor.Ui_MainWindow()
+ui.setupUi(window)
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+QtCore.QTimer.singleShot(5000, app.quit)
+app.exec_()
+"""
+
+
+def run_once():
+    environment = dict(os.environ)
+    environment.setdefault("QT_QPA_PLATFORM", "offscreen")
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD.format(directory=REPO_DIRECTORY)],
+                               capture_output=True, text=True, env=environment, cwd=REPO_DIRECTORY)
+    result = [line.split()[1:] for line in completed.stdout.splitlines() if line.startswith("RESULT")]
+    if not result:
+        raise RuntimeError(completed.stderr[-2000:])
+    imports = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            if depth <= 1:
+                # top-level imports and what they import directly, the time includes all their dependencies
+                imports[name.strip()] = int(cumulative) / 1e3
+    imported, painted, reportlab, pandas = result[0]
+    return float(imported), float(painted), reportlab == "True", pandas == "True", imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    runs = [run_once() for _ in range(args.runs)]
+    imported = np.array([run[0] for run in runs]) * 1e3
+    painted = np.array([run[1] for run in runs]) * 1e3
+    print(f"import ICU_monitor ms  median: {np.median(imported):.0f}  max: {imported.max():.0f}")
+    print(f"first paint ms         median: {np.median(painted):.0f}  max: {painted.max():.0f}")
+    print(f"reportlab loaded at startup: {runs[-1][2]}  pandas loaded at startup: {runs[-1][3]}")
+    print("slowest imports (last run):")
+    for name, milliseconds in sorted(runs[-1][4].items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {milliseconds:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
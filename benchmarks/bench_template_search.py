@@ -0,0 +1,42 @@
+"""
+Description:
+    - Template search time per hour of recording (FFT normalized cross-correlation, chunked).
+    - python benchmarks/bench_template_search.py [--hours 1] [--template-seconds 1 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from template_search import best_matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=1)
+    parser.add_argument("--sampling-frequencies", type=float, nargs="+", default=[125, 360])
+    parser.add_argument("--template-seconds", type=float, nargs="+", default=[0.8, 2])
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'fs':>6} {'template s':>10} {'samples':>10} {'s / hour':>9} {'found':>6}")
+    for sampling_frequency in args.sampling_frequencies:
+        n_samples = int(args.hours * 3600 * sampling_frequency)
+        signal = np.cumsum(rng.standard_normal(n_samples)) * 0.01 + rng.standard_normal(n_samples)
+        for template_seconds in args.template_seconds:
+            m = int(template_seconds * sampling_frequency)
+            template = signal[n_samples // 3: n_samples // 3 + m].copy()
+            target = 2 * n_samples // 3
+            signal[target: target + m] = template * 1.5 + 0.2
+            start = time.perf_counter()
+            matches = best_matches(signal, template, top_k=10)
+            elapsed = time.perf_counter() - start
+            found = any(abs(position - target) < 2 for _, position in matches)
+            print(f"{sampling_frequency:>6.0f} {template_seconds:>10.1f} {n_samples:>10} {elapsed / args.hours:>9.3f} {str(found):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Description:
+    - Offscreen regression harness for the dual-graph state machine: cine playback, link, Move_signals, rewind,
+      zoom_in/zoom_out and panning, scripted against synthetic recordings.
+    - The PlotUpdater timers are replaced by a fake clock, so every run plays exactly the same frames.
+    - Checks state invariants after each action and per-operation time budgets; exits with 1 on any failure.
+    - python benchmarks/gui_harness.py [--channels 16] [--repeats 20] [--budget-scale 1.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+import ICU_monitor
+
+SAMPLING_FREQUENCY = 125
+WINDOW = 200
+
+# median milliseconds allowed per operation
+BUDGETS = {
+    "cine tick": 15.0,
+    "link": 5.0,
+    "move": 5.0,
+    "rewind": 15.0,
+    "zoom": 2.0,
+    "panning": 2.0,
+}
+
+
+class FakeTimer(object):
+    """
+    Description:
+        - Stand-in for the QTimer of a PlotUpdater, fired by the FakeClock instead of the event loop.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.interval = 0
+        self.due = None
+        self._callbacks = []
+        self.timeout = self
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def start(self, interval=None):
+        if interval is not None:
+            self.interval = interval
+        self.due = self.clock.now + self.interval
+
+    def stop(self):
+        self.due = None
+
+    def isActive(self):
+        return self.due is not None
+
+    def fire(self):
+        self.due += self.interval
+        for callback in self._callbacks:
+            callback()
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+        self.timers = []
+
+    def timer(self):
+        timer = FakeTimer(self)
+        self.timers.append(timer)
+        return timer
+
+    def advance(self, milliseconds):
+        """
+        Description:
+            - Move time forward, firing every timer that becomes due in order.
+        """
+        end = self.now + milliseconds
+        while True:
+            active = [timer for timer in self.timers if timer.due is not None and timer.due <= end]
+            if not active:
+                break
+            timer = min(active, key=lambda timer: timer.due)
+            self.now = timer.due
+            timer.fire()
+        self.now = end
+
+
+class Harness(object):
+    def __init__(self, n_channels, repeats, budget_scale):
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        self.window = QtWidgets.QMainWindow()
+        self.ui = ICU_monitor.Ui_MainWindow()
+        self.ui.setupUi(self.window)
+        self.window.show()
+        self.clock = FakeClock()
+        for updater in (self.ui.plot_updater1, self.ui.plot_updater2):
+            updater.timer.stop()
+            updater.timer = self.clock.timer()
+            updater.timer.timeout.connect(updater.update)
+        self.repeats = repeats
+        self.budget_scale = budget_scale
+        self.timings = {}
+        self.failures = []
+        self.load(n_channels)
+
+    def load(self, n_channels):
+        rng = np.random.default_rng(0)
+        self.ui.sampling_frequency = SAMPLING_FREQUENCY
+        t = np.arange(60 * SAMPLING_FREQUENCY) / SAMPLING_FREQUENCY
+        for channel in range(n_channels):
+            samples = np.sin(2 * np.pi * (1 + 0.1 * channel) * t) + 0.05 * rng.standard_normal(len(t)) + channel
+            self.ui.add_signal(channel % 2 == 0, samples, f"ch{channel}", None)
+        self.check_invariants("load")
+
+    def timed(self, name, action):
+        start = time.perf_counter()
+        action()
+        self.timings.setdefault(name, []).append((time.perf_counter() - start) * 1e3)
+
+    def expect(self, condition, message):
+        if not condition:
+            self.failures.append(message)
+
+    def graphs(self):
+        ui = self.ui
+        return (
+            ("graph 1", ui.magnitude_graph1, ui.plot_items_graph1, ui.labels1, ui.colours1, ui.visability1, ui.sources1, ui.comboBox_signals_graph1, ui.plot_updater1),
+            ("graph 2", ui.magnitude_graph2, ui.plot_items_graph2, ui.labels2, ui.colours2, ui.visability2, ui.sources2, ui.comboBox_signals_graph2, ui.plot_updater2),
+        )
+
+    def check_invariants(self, step):
+        for name, magnitude, items, labels, colours, visability, sources, combobox, updater in self.graphs():
+            lengths = {len(magnitude), len(items), len(labels), len(colours), len(visability), len(sources), combobox.count()}
+            self.expect(len(lengths) == 1, f"{step}: {name} per-signal lists out of step {sorted(lengths)}")
+            if magnitude:
+                self.expect(0 <= updater.position <= len(magnitude[0]) - WINDOW + 1, f"{step}: {name} position {updater.position} outside the signal")
+        if self.ui.checkBox_link.isChecked():
+            self.expect(self.ui.pause_graph1.text() == self.ui.pause_graph2.text(), f"{step}: linked graphs disagree on pause")
+            self.expect(self.ui.comboBox_speed_graph1.currentIndex() == self.ui.comboBox_speed_graph2.currentIndex(), f"{step}: linked graphs disagree on speed")
+
+    def select(self, flag, index):
+        combobox = self.ui.comboBox_signals_graph1 if flag else self.ui.comboBox_signals_graph2
+        combobox.setCurrentIndex(index)
+        self.ui.control_single_plot(flag)
+
+    def set_paused(self, flag, paused):
+        button = self.ui.pause_graph1 if flag else self.ui.pause_graph2
+        if (button.text() == "Resume") != paused:
+            self.ui.pause(flag)
+
+    def expect_shown(self, step, widget, view_range, axis, expected):
+        # the controller's last applied range, and the widget showing it (with pyqtgraph's padding around it)
+        shown = view_range._shown_x if axis == 0 else view_range._shown_y
+        self.expect(shown is not None and np.allclose(shown, expected), f"{step}: range {shown} is not {expected}")
+        low, high = widget.viewRange()[axis]
+        self.expect(low <= expected[0] and expected[1] <= high, f"{step}: the widget shows {low:.3f}..{high:.3f}, not {expected}")
+
+    def mouse(self, widget, kind, y):
+        event = QtGui.QMouseEvent(kind, QtCore.QPointF(10, y), QtCore.Qt.LeftButton, QtCore.Qt.LeftButton, QtCore.Qt.NoModifier)
+        if kind == QtCore.QEvent.MouseButtonPress:
+            widget.mousePressEvent(event)
+        else:
+            widget.mouseMoveEvent(event)
+
+    def scenario_cine(self):
+        ui = self.ui
+        for updater in (ui.plot_updater1, ui.plot_updater2):
+            updater.set_update_interval(ICU_monitor.SPEED_INTERVALS[0])
+            updater.start()
+        start = ui.plot_updater1.position
+        for _ in range(self.repeats):
+            self.timed("cine tick", lambda: self.clock.advance(ICU_monitor.SPEED_INTERVALS[0]))
+        self.expect(ui.plot_updater1.position == start + self.repeats, f"cine: graph 1 advanced {ui.plot_updater1.position - start} frames, expected {self.repeats}")
+        self.expect(ui.plot_updater1.position == ui.plot_updater2.position, "cine: graphs drifted apart at the same speed")
+        # the updater already points at the next frame
+        shown = ui.plot_updater1.position - 1
+        self.expect_shown("cine", ui.widget_plot, ui.view_range1, 0, (shown / SAMPLING_FREQUENCY, (shown + WINDOW) / SAMPLING_FREQUENCY))
+        self.check_invariants("cine")
+
+    def scenario_link(self):
+        ui = self.ui
+        # changing the speed restarts the timer, so it is set before pausing
+        ui.comboBox_speed_graph1.setCurrentIndex(2)
+        self.set_paused(True, True)
+        self.set_paused(False, True)
+        for _ in range(self.repeats):
+            ui.checkBox_link.setChecked(True)
+            self.timed("link", ui.link)
+            self.expect(ui.scale_factor_graph1 == ui.scale_factor_graph2, "link: scale factors differ")
+            self.check_invariants("link")
+            ui.checkBox_link.setChecked(False)
+        ui.checkBox_link.setChecked(True)
+        ui.link()
+        position1, position2 = ui.plot_updater1.position, ui.plot_updater2.position
+        self.clock.advance(1000)
+        self.expect((ui.plot_updater1.position, ui.plot_updater2.position) == (position1, position2), "link: paused graphs kept playing")
+        ui.pause(True)
+        self.clock.advance(ICU_monitor.SPEED_INTERVALS[2] * 10)
+        self.expect(ui.plot_updater1.position - position1 == ui.plot_updater2.position - position2 == 10, "link: linked graphs did not play in step")
+        ui.pause(True)
+        ui.checkBox_link.setChecked(False)
+        self.check_invariants("link playback")
+
+    def scenario_move(self):
+        ui = self.ui
+        for _ in range(self.repeats):
+            flag = len(ui.magnitude_graph1) >= len(ui.magnitude_graph2)
+            source = ui.magnitude_graph1 if flag else ui.magnitude_graph2
+            target = ui.magnitude_graph2 if flag else ui.magnitude_graph1
+            counts = (len(source), len(target))
+            self.select(flag, 0)
+            moved = source[0]
+            self.timed("move", lambda: ui.Move_signals(flag))
+            self.expect((len(source), len(target)) == (counts[0] - 1, counts[1] + 1), "move: signal counts did not change by one")
+            self.expect(target[-1] is moved, "move: the moved signal is not the last one of the other graph")
+            self.check_invariants("move")
+
+    def scenario_rewind(self):
+        ui = self.ui
+        self.set_paused(True, True)
+        self.set_paused(False, True)
+        for _ in range(self.repeats):
+            ui.plot_updater1.set_position(500)
+            ui.plot_updater2.set_position(700)
+            self.timed("rewind", lambda: ui.rewind(True))
+            self.expect(ui.plot_updater1.position == 0, "rewind: graph 1 not back at the start")
+            self.expect(ui.plot_updater2.position == 700, "rewind: unlinked graph 2 moved")
+            self.check_invariants("rewind")
+        ui.checkBox_link.setChecked(True)
+        ui.link()
+        ui.plot_updater1.set_position(500)
+        ui.plot_updater2.set_position(700)
+        self.timed("rewind", lambda: ui.rewind(False))
+        self.expect((ui.plot_updater1.position, ui.plot_updater2.position) == (0, 0), "rewind: linked graphs not both back at the start")
+        self.check_invariants("linked rewind")
+        ui.checkBox_link.setChecked(False)
+
+    def scenario_zoom(self):
+        ui = self.ui
+        self.set_paused(True, True)
+        ui.get_and_plot_data_in_graph1(ui.plot_updater1.position)
+        for _ in range(self.repeats):
+            scale = ui.scale_factor_graph1
+            self.timed("zoom", lambda: ui.zoom_in(True))
+            self.expect(abs(ui.scale_factor_graph1 - scale * 3 / 4) < 1e-12, "zoom: zoom_in did not scale by 3/4")
+            self.timed("zoom", lambda: ui.zoom_out(True))
+            self.expect(abs(ui.scale_factor_graph1 - scale * 3 / 4 * 5 / 4) < 1e-12, "zoom: zoom_out did not scale by 5/4")
+        ui.view_range1.flush()
+        expected = (ui.minimum1 * ui.scale_factor_graph1 + ui.panning_offset1, ui.maximum1 * ui.scale_factor_graph1 + ui.panning_offset1)
+        self.expect_shown("zoom", ui.widget_plot, ui.view_range1, 1, expected)
+        self.check_invariants("zoom")
+
+    def scenario_panning(self):
+        ui = self.ui
+        self.set_paused(True, True)
+        ui.get_and_plot_data_in_graph1(ui.plot_updater1.position)
+        ui.scale_factor_graph1 = 0.5
+        offset = ui.panning_offset1
+        self.mouse(ui.widget, QtCore.QEvent.MouseButtonPress, 100)
+        for _ in range(self.repeats):
+            self.timed("panning", lambda: self.mouse(ui.widget, QtCore.QEvent.MouseMove, 120))
+        self.expect(ui.panning_offset1 > offset, "panning: dragging down did not move the signal up")
+        self.check_invariants("panning")
+
+    def run(self):
+        ui = self.ui
+        self.scenario_cine()
+        self.scenario_link()
+        self.scenario_move()
+        self.scenario_rewind()
+        self.scenario_zoom()
+        self.scenario_panning()
+        print(f"{'operation':<10} {'median ms':>10} {'max ms':>8} {'budget':>8}")
+        for name, timings in self.timings.items():
+            budget = BUDGETS[name] * self.budget_scale
+            median = float(np.median(timings))
+            print(f"{name:<10} {median:>10.2f} {max(timings):>8.2f} {budget:>8.1f}")
+            self.expect(median <= budget, f"{name}: median {median:.2f} ms over the {budget:.1f} ms budget")
+        for failure in self.failures:
+            print("FAIL", failure)
+        ui.workers.shutdown()
+        return not self.failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--channels", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget, e.g. on slow machines")
+    args = parser.parse_args()
+    harness = Harness(args.channels, args.repeats, args.budget_scale)
+    passed = harness.run()
+    print("passed" if passed else f"{len(harness.failures)} failures")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import hashlib
+import os
+
+import numpy as np
+
+CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".icu_monitor_cache")
+# bytes hashed at each end of a file, enough to tell recordings apart without reading multi-GB files
+FINGERPRINT_BLOCK = 1 << 20
+
+
+def file_fingerprint(*paths):
+    """
+    Description:
+        - Content hash of a recording: its size plus the first and last MiB, so it stays cheap for huge files.
+        - Recordings split over several files (WFDB header and signal files) pass all of them.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        size = os.path.getsize(path)
+        digest.update(str(size).encode())
+        with open(path, "rb") as recording:
+            digest.update(recording.read(FINGERPRINT_BLOCK))
+            if size > FINGERPRINT_BLOCK:
+                recording.seek(max(FINGERPRINT_BLOCK, size - FINGERPRINT_BLOCK))
+                digest.update(recording.read(FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+def cache_path(fingerprint, channel):
+    return os.path.join(CACHE_DIRECTORY, f"{fingerprint}_{channel}.npy")
+
+
+def store_channel(samples, fingerprint, channel):
+    """
+    Description:
+        - Write a parsed channel to the binary cache (if it is not there yet) so it can be memory mapped later.
+    """
+    path = cache_path(fingerprint, channel)
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        temporary = path + ".tmp.npy"
+        np.save(temporary, np.asarray(samples))
+        os.replace(temporary, path)
+    return path
+
+
+def extent_path(fingerprint, channel):
+    return os.path.join(CACHE_DIRECTORY, f"{fingerprint}_{channel}.extent.npz")
+
+
+def store_extent(block_minimum, block_maximum, fingerprint, channel):
+    """
+    Description:
+        - Write the min/max block index of a channel next to the cached samples, so a restore does not scan it again.
+    """
+    path = extent_path(fingerprint, channel)
+    if not os.path.exists(path):
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        temporary = path + ".tmp.npz"
+        np.savez(temporary, block_minimum=block_minimum, block_maximum=block_maximum)
+        os.replace(temporary, path)
+    return path
+
+
+def load_extent(fingerprint, channel):
+    """
+    Description:
+        - (block minimum, block maximum) of a cached channel, None when they were never stored.
+    """
+    path = extent_path(fingerprint, channel)
+    if os.path.exists(path):
+        with np.load(path) as blocks:
+            return blocks["block_minimum"], blocks["block_maximum"]
+    return None
+
+
+def load_channel(fingerprint, channel):
+    """
+    Description:
+        - Memory map a cached channel, returns None when it was never cached.
+    """
+    path = cache_path(fingerprint, channel)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    return None
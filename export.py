@@ -0,0 +1,209 @@
+import os
+
+import numpy as np
+
+EXPORT_FORMATS = ("CSV", "WFDB (format 16)")
+# samples per channel written by one worker task, small enough for steady progress on multi-GB exports
+CHUNK_SAMPLES = 1 << 18
+# digital span used by the 16-bit export, a little under the int16 range so rounding never clips
+DIGITAL_SPAN = 65000
+
+
+def channel_spec(samples):
+    """
+    Description:
+        - Picklable description of where a loaded signal's samples live, so a worker process can read them itself:
+          ("record", path, index) for binary recordings, ("npy", path, gain, offset) for stored/cached channels.
+        - A managed channel must already have its backing file, see prepare_specs.
+    """
+    from memory_manager import ManagedChannel
+    from signal_readers import RecordChannel
+    if isinstance(samples, RecordChannel):
+        return ("record", samples.record.path, samples.index)
+    if isinstance(samples, ManagedChannel):
+        if samples.page_path is None:
+            raise ValueError(f"{samples.name} has no backing file yet")
+        return ("npy", samples.page_path, samples.gain, samples.offset)
+    if isinstance(samples, np.memmap):
+        return ("npy", samples.filename, None, 0.0)
+    raise ValueError("the signal is not backed by a file")
+
+
+def prepare_specs(workers, memory, signals, callback, error_callback):
+    """
+    Description:
+        - Call callback(specs) (in the GUI thread) once every signal can be read by the worker processes.
+        - Managed channels that only live in memory are first written to their backing file on a worker thread,
+          so the GUI thread never waits on the disk.
+    Raises:
+        - ValueError if a signal is neither backed by a file nor managed.
+    """
+    from memory_manager import ManagedChannel
+    from signal_readers import RecordChannel
+    for samples in signals:
+        if not isinstance(samples, (RecordChannel, ManagedChannel, np.memmap)):
+            raise ValueError("the signal is not backed by a file")
+    unwritten = [samples for samples in signals if isinstance(samples, ManagedChannel) and samples.page_path is None]
+    if not unwritten:
+        callback([channel_spec(samples) for samples in signals])
+        return
+    workers.submit_thread(lambda _: callback([channel_spec(samples) for samples in signals]),
+                          lambda: [memory.backing_file(channel) for channel in unwritten], error_callback=error_callback)
+
+
+class StoredChannel(object):
+    """
+    Description:
+        - Worker side view of a stored channel: a memory-mapped .npy file, int16 ones with their gain and offset.
+    """
+
+    def __init__(self, path, gain=None, offset=0.0):
+        self.data = np.load(path, mmap_mode="r")
+        self.gain = gain
+        self.offset = offset
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        values = np.asarray(self.data[key], dtype=np.float64)
+        return values if self.gain is None else values * self.gain + self.offset
+
+
+def open_spec(spec):
+    """
+    Description:
+        - Worker side: the channel a spec describes, read lazily through slicing.
+        - Every task opens its specs again, nothing is kept between tasks that could outlive the file it maps.
+    """
+    if spec[0] == "record":
+        from signal_readers import RecordChannel, open_record
+        return RecordChannel(open_record(spec[1]), spec[2])
+    return StoredChannel(*spec[1:])
+
+
+def read_spec(spec, start, stop):
+    """
+    Description:
+        - Samples [start, stop) of a spec in physical units, NaN before its first or after its last sample.
+    """
+    from timeline import aligned_window
+    return aligned_window(open_spec(spec), start, stop - start)
+
+
+def wfdb_scaling(minimum, maximum):
+    """
+    Returns:
+        - (ADC gain, baseline) mapping [minimum, maximum] onto the 16-bit range around zero.
+    """
+    gain = DIGITAL_SPAN / (float(maximum - minimum) or 1.0)
+    return gain, -int(round((maximum + minimum) / 2 * gain))
+
+
+def data_path(path, export_format):
+    return os.path.splitext(path)[0] + ".dat" if export_format != "CSV" else path
+
+
+def write_header(path, export_format, labels, units, sampling_frequency, n_samples, scaling):
+    """
+    Description:
+        - Start the output: the CSV header line, or the WFDB .hea file and an empty .dat file.
+        - A single CSV channel is written as "Voltage" so the file can be opened again by the viewer.
+    """
+    if export_format == "CSV":
+        columns = ["Voltage"] if len(labels) == 1 else [label.replace(",", " ") for label in labels]
+        with open(path, "w", encoding="utf-8") as output:
+            output.write(",".join(["Time"] + columns) + "\n")
+        return
+    record_name = os.path.splitext(os.path.basename(path))[0]
+    lines = [f"{record_name} {len(labels)} {sampling_frequency:g} {n_samples}"]
+    for label, unit, (gain, baseline) in zip(labels, units, scaling):
+        lines.append(f"{record_name}.dat 16 {gain!r}({baseline})/{unit} 16 0 0 0 0 {label}")
+    with open(path, "w", encoding="utf-8") as header:
+        header.write("\n".join(lines) + "\n")
+    open(data_path(path, export_format), "wb").close()
+
+
+def write_chunk(path, export_format, specs, start, stop, first_sample, sampling_frequency, scaling, offsets=None):
+    """
+    Description:
+        - Worker task: append timeline samples [start, stop) of every channel to the output.
+    Returns:
+        - number of samples written per channel.
+    """
+    offsets = offsets or [0] * len(specs)
+    values = np.column_stack([read_spec(spec, start - offset, stop - offset) for spec, offset in zip(specs, offsets)])
+    if export_format == "CSV":
+        time = np.arange(start - first_sample, stop - first_sample) / sampling_frequency
+        with open(path, "a", encoding="utf-8") as output:
+            np.savetxt(output, np.column_stack([time, values]), fmt="%.6g", delimiter=",")
+    else:
+        gains = np.array([gain for gain, _ in scaling])
+        baselines = np.array([baseline for _, baseline in scaling])
+        digital = np.clip(np.round(np.nan_to_num(values * gains + baselines, nan=-32768)), -32768, 32767).astype("<i2")
+        with open(data_path(path, export_format), "ab") as output:
+            output.write(digital.tobytes())
+    return stop - start
+
+
+class RangeExport(object):
+    """
+    Description:
+        - Export of samples [start, stop) of a timeline's channels, written chunk by chunk by worker tasks.
+        - offsets: where each channel starts on the timeline (0 by default); the samples a channel does not cover
+          are written as NaN in CSV and as the invalid sample -32768 in WFDB.
+        - Only one chunk per channel is ever in memory; progress is reported after each chunk and a cancelled
+          export removes its partial output.
+    """
+
+    def __init__(self, workers, path, export_format, specs, labels, units, start, stop, sampling_frequency, scaling=None, offsets=None):
+        self.workers = workers
+        self.path = path
+        self.export_format = export_format
+        self.specs = specs
+        self.offsets = offsets or [0] * len(specs)
+        self.labels = labels
+        self.units = units
+        self.start = start
+        self.stop = stop
+        self.sampling_frequency = sampling_frequency
+        self.scaling = scaling
+        self.position = start
+        self.cancelled = False
+        self.progress_callback = None
+        self.finished_callback = None
+        self.error_callback = None
+
+    def run(self, progress_callback, finished_callback, error_callback):
+        self.progress_callback = progress_callback
+        self.finished_callback = finished_callback
+        self.error_callback = error_callback
+        write_header(self.path, self.export_format, self.labels, self.units, self.sampling_frequency, self.stop - self.start, self.scaling)
+        self._next_chunk()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _next_chunk(self):
+        if self.cancelled:
+            self._remove_output()
+        elif self.position >= self.stop:
+            self.finished_callback(self.path)
+        else:
+            stop = min(self.position + CHUNK_SAMPLES, self.stop)
+            self.workers.submit(self._chunk_written, write_chunk, self.path, self.export_format, self.specs, self.position,
+                                stop, self.start, self.sampling_frequency, self.scaling, self.offsets, error_callback=self._failed)
+
+    def _chunk_written(self, count):
+        self.position += count
+        self.progress_callback((self.position - self.start) / max(self.stop - self.start, 1))
+        self._next_chunk()
+
+    def _failed(self, error):
+        self._remove_output()
+        self.error_callback(error)
+
+    def _remove_output(self):
+        for path in {self.path, data_path(self.path, self.export_format)}:
+            if os.path.exists(path):
+                os.remove(path)
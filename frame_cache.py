@@ -0,0 +1,69 @@
+import weakref
+from collections import OrderedDict, namedtuple
+
+import math
+
+import numpy as np
+
+import instrumentation
+from timeline import aligned_window
+
+# x values, the window of every signal, and the smallest/largest sample over all of them
+Frame = namedtuple("Frame", "x_values windows minimum maximum")
+
+
+class FrameCache(object):
+    """
+    Description:
+        - Bounded LRU cache of prepared frames keyed by (channel set, channel offsets, position, window length,
+          sampling frequency). The offsets place each channel on the graph's timeline (see timeline.Timeline).
+        - Rewinding, re-watching or scrubbing over a segment reuses the frames instead of slicing and scanning the
+          signals again. Entries keep weak references to their signals, so a frame is never served for a signal
+          that replaced a removed one.
+    """
+
+    def __init__(self, name, max_bytes=64 << 20):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+
+    def frame(self, signals, position, window, sampling_frequency, offsets=None):
+        offsets = tuple(offsets) if offsets is not None else (0,) * len(signals)
+        key = (tuple(id(signal) for signal in signals), offsets, position, window, sampling_frequency)
+        entry = self._frames.get(key)
+        if entry is not None and all(reference() is signal for reference, signal in zip(entry[0], signals)):
+            self._frames.move_to_end(key)
+            self.hits += 1
+            instrumentation.count(f"{self.name}.hits")
+            return entry[1]
+        self.misses += 1
+        instrumentation.count(f"{self.name}.misses")
+        # copies, so a cached frame does not keep a whole recording alive
+        windows = [np.array(aligned_window(signal, position - offset, window)) for signal, offset in zip(signals, offsets)]
+        x_values = np.linspace(position / sampling_frequency, (position + window) / sampling_frequency, window)
+        # a channel may not cover the whole window on the timeline, missing samples are NaN
+        covered = [values for values in windows if not np.isnan(values).all()]
+        frame = Frame(x_values, windows, min((np.nanmin(values) for values in covered), default=math.inf),
+                      max((np.nanmax(values) for values in covered), default=-math.inf))
+        self._store(key, [weakref.ref(signal) for signal in signals], frame)
+        return frame
+
+    def _store(self, key, references, frame):
+        if key in self._frames:
+            self.bytes -= self._size(self._frames.pop(key)[1])
+        self._frames[key] = (references, frame)
+        self.bytes += self._size(frame)
+        while self.bytes > self.max_bytes and len(self._frames) > 1:
+            self.bytes -= self._size(self._frames.popitem(last=False)[1][1])
+        instrumentation.set_gauge(f"{self.name}.bytes", self.bytes)
+
+    @staticmethod
+    def _size(frame):
+        return frame.x_values.nbytes + sum(values.nbytes for values in frame.windows)
+
+    def clear(self):
+        self._frames.clear()
+        self.bytes = 0
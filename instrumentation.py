@@ -0,0 +1,51 @@
+import logging
+from collections import Counter
+
+logger = logging.getLogger("icu_monitor")
+
+_counters = Counter()
+_gauges = {}
+
+
+def count(name, amount=1):
+    """
+    Description:
+        - Add to a named counter (e.g. "frame_cache.hits").
+    """
+    _counters[name] += amount
+
+
+def set_gauge(name, value):
+    """
+    Description:
+        - Record the latest value of a named measurement (e.g. a cache size).
+    """
+    _gauges[name] = value
+
+
+def remove_gauge(name):
+    """
+    Description:
+        - Forget a measurement whose subject is gone (e.g. a signal that was closed).
+    """
+    _gauges.pop(name, None)
+
+
+def snapshot():
+    """
+    Returns:
+        - dict of every counter and gauge by name.
+    """
+    values = dict(_counters)
+    values.update(_gauges)
+    return values
+
+
+def reset():
+    _counters.clear()
+    _gauges.clear()
+
+
+def log_snapshot(level=logging.INFO):
+    for name, value in sorted(snapshot().items()):
+        logger.log(level, "%s: %s", name, value)
@@ -0,0 +1,216 @@
+import os
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+import instrumentation
+from channel_cache import CACHE_DIRECTORY
+
+STORAGE_TYPES = ("float32", "int16")
+PAGE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "paged")
+
+
+def _remove_page(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ManagedChannel(object):
+    """
+    Description:
+        - A loaded signal stored compactly: float32, or int16 with a gain and offset.
+        - Slicing returns float64 physical values like the other channels, whether the samples are in memory or
+          paged out to a memory-mapped file.
+    """
+
+    def __init__(self, manager, name, data, gain=None, offset=0.0):
+        self.manager = manager
+        self.name = name
+        self.data = data
+        self.gain = gain
+        self.offset = offset
+        self.resident = True
+        self.paging_out = False
+        self.page_path = None
+
+    @property
+    def storage(self):
+        return self.data.dtype.name
+
+    @property
+    def resident_bytes(self):
+        return self.data.nbytes if self.resident else 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        self.manager.touch(self)
+        values = self.data[key]
+        if self.gain is None:
+            return values.astype(np.float64) if isinstance(values, np.ndarray) else float(values)
+        return values * self.gain + self.offset
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+
+class MemoryManager(object):
+    """
+    Description:
+        - Keeps the in-memory samples of the loaded signals under a budget.
+        - When the budget is exceeded the least recently used channels are written to a memory-mapped file and read
+          from there; the OS page cache then decides what stays in RAM. Raising the budget reads them back in.
+        - submit_thread(callback, function, *args, error_callback=None) runs the writes in the background (see
+          WorkerPool.submit_thread): a channel keeps its samples in memory until its file is written, then the
+          memory map is swapped in. Without it the files are written right away.
+        - Binary recordings and cached channels are already memory mapped and are left as they are.
+    """
+
+    def __init__(self, budget_bytes=1 << 30, storage="float32", submit_thread=None):
+        self.budget_bytes = budget_bytes
+        self.storage = storage
+        self.submit_thread = submit_thread
+        self._channels = OrderedDict()
+        self._names = {}
+        self._write_lock = threading.Lock()
+
+    def manage(self, samples, name):
+        """
+        Description:
+            - Compact copy of an in-memory signal, anything memory mapped or lazy is returned unchanged.
+        """
+        if not isinstance(samples, np.ndarray) or isinstance(samples, np.memmap):
+            return samples
+        values = np.asarray(samples, dtype=np.float64)
+        if self.storage == "int16" and len(values):
+            low, high = values.min(), values.max()
+            offset = (high + low) / 2
+            gain = (high - low) / 65534 or 1.0
+            channel = ManagedChannel(self, name, np.round((values - offset) / gain).astype(np.int16), gain, offset)
+        else:
+            channel = ManagedChannel(self, name, values.astype(np.float32))
+        key = id(channel)
+        self._channels[key] = weakref.ref(channel, lambda _, key=key: self._forget(key))
+        self._names[key] = name
+        self.enforce()
+        return channel
+
+    def release(self, samples):
+        """
+        Description:
+            - Stop managing a signal that was closed: it no longer counts against the budget and its gauge goes away.
+            - Its page file is removed when the last reference to it is dropped.
+        """
+        key = id(samples)
+        reference = self._channels.get(key)
+        if reference is not None and reference() is samples:
+            self._forget(key)
+            self.report()
+
+    def touch(self, channel):
+        key = id(channel)
+        if key in self._channels:
+            self._channels.move_to_end(key)
+
+    def channels(self):
+        """
+        Returns:
+            - the live managed channels, least recently used first.
+        """
+        return [channel for channel in (reference() for reference in self._channels.values()) if channel is not None]
+
+    @property
+    def resident_bytes(self):
+        return sum(channel.resident_bytes for channel in self.channels())
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        # most recently used channels come back first (or stay, if their file is still being written), as long as they fit
+        channels = self.channels()
+        resident = sum(channel.resident_bytes for channel in channels if not channel.paging_out)
+        for channel in reversed(channels):
+            if (not channel.resident or channel.paging_out) and resident + channel.data.nbytes <= budget_bytes:
+                self.page_in(channel)
+                resident += channel.data.nbytes
+        self.enforce()
+
+    def enforce(self):
+        channels = self.channels()
+        # channels whose file is being written already count as paged out
+        resident = sum(channel.resident_bytes for channel in channels if not channel.paging_out)
+        for channel in channels:
+            if resident <= self.budget_bytes:
+                break
+            if channel.resident and not channel.paging_out:
+                resident -= channel.data.nbytes
+                self.page_out(channel)
+        self.report()
+
+    def backing_file(self, channel):
+        """
+        Description:
+            - .npy file holding the stored samples of a channel (written the first time), e.g. for worker processes.
+            - The samples never change, so the file is kept and reused until the channel is dropped.
+            - May run on a worker thread (see export.prepare_specs) while the GUI thread pages channels out.
+        """
+        with self._write_lock:
+            if channel.page_path is None:
+                os.makedirs(PAGE_DIRECTORY, exist_ok=True)
+                # never named after id(channel): ids are reused, and a worker may still read the file of a dropped channel
+                path = os.path.join(PAGE_DIRECTORY, f"{os.getpid()}_{uuid.uuid4().hex}.npy")
+                np.save(path, channel.data)
+                channel.page_path = path
+                weakref.finalize(channel, _remove_page, path)
+        return channel.page_path
+
+    def page_out(self, channel):
+        if channel.page_path is not None or self.submit_thread is None:
+            self._swap_in_file(channel, self.backing_file(channel))
+            return
+        channel.paging_out = True
+        self.submit_thread(lambda path, channel=channel: self._page_written(channel, path), self.backing_file, channel,
+                           error_callback=lambda error, channel=channel: self._page_failed(channel, error))
+
+    def _page_written(self, channel, path):
+        # paged back in (budget raised) while the file was written
+        if not channel.paging_out:
+            return
+        channel.paging_out = False
+        self._swap_in_file(channel, path)
+        self.report()
+
+    def _page_failed(self, channel, error):
+        channel.paging_out = False
+        instrumentation.logger.error("could not page out %s", channel.name, exc_info=error)
+
+    def _swap_in_file(self, channel, path):
+        channel.data = np.load(path, mmap_mode="r")
+        channel.resident = False
+        instrumentation.logger.info("paged out %s (%d bytes)", channel.name, channel.data.nbytes)
+
+    def page_in(self, channel):
+        channel.paging_out = False
+        if not channel.resident:
+            channel.data = np.array(channel.data)
+            channel.resident = True
+            instrumentation.logger.info("paged in %s (%d bytes)", channel.name, channel.data.nbytes)
+
+    def report(self):
+        channels = self.channels()
+        instrumentation.set_gauge("memory.resident_bytes", sum(channel.resident_bytes for channel in channels))
+        instrumentation.set_gauge("memory.paged_out_channels", sum(not channel.resident for channel in channels))
+        for channel in channels:
+            instrumentation.set_gauge(f"memory.resident.{channel.name}", channel.resident_bytes)
+
+    def _forget(self, key):
+        self._channels.pop(key, None)
+        name = self._names.pop(key, None)
+        if name is not None:
+            instrumentation.remove_gauge(f"memory.resident.{name}")
@@ -0,0 +1,77 @@
+"""
+Description:
+    - Headless viewer for the monitoring server, used to measure end-to-end latency and fan-out throughput.
+    - python monitor_client.py --clients 8 --seconds 10
+"""
+import argparse
+import socket
+import threading
+import time
+
+import numpy as np
+
+from monitor_protocol import DEFAULT_MONITOR_PORT, FrameReader, decode_frame
+
+
+class ClientStats(object):
+    def __init__(self):
+        self.frames = 0
+        self.samples = 0
+        self.bytes = 0
+        self.gaps = 0
+        self.latencies = []
+
+
+def run_client(host, port, seconds, stats):
+    reader = FrameReader()
+    last_sequence = None
+    deadline = time.time() + seconds
+    with socket.create_connection((host, port)) as connection:
+        connection.settimeout(0.5)
+        while time.time() < deadline:
+            try:
+                data = connection.recv(1 << 16)
+            except socket.timeout:
+                continue
+            if not data:
+                break
+            stats.bytes += len(data)
+            received = time.time()
+            for payload in reader.feed(data):
+                frame = decode_frame(payload)
+                if frame[0] != "samples":
+                    continue
+                header, values = frame[1], frame[2]
+                if last_sequence is not None and header["sequence"] > last_sequence + 1:
+                    stats.gaps += header["sequence"] - last_sequence - 1
+                last_sequence = header["sequence"]
+                stats.frames += 1
+                stats.samples += values.size
+                stats.latencies.append(received - header["sent"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_MONITOR_PORT)
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    stats = [ClientStats() for _ in range(args.clients)]
+    threads = [threading.Thread(target=run_client, args=(args.host, args.port, args.seconds, client)) for client in stats]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = np.concatenate([client.latencies for client in stats if client.latencies] or [np.zeros(0)]) * 1e3
+    frames = sum(client.frames for client in stats)
+    print(f"clients: {args.clients}  frames: {frames}  frames/s: {frames / args.seconds:.1f}  "
+          f"samples/s: {sum(client.samples for client in stats) / args.seconds:.0f}  "
+          f"MB/s: {sum(client.bytes for client in stats) / args.seconds / 1e6:.3f}  "
+          f"gaps: {sum(client.gaps for client in stats)}")
+    if len(latencies):
+        print(f"latency ms  p50: {np.percentile(latencies, 50):.3f}  p99: {np.percentile(latencies, 99):.3f}  max: {latencies.max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Description:
+    - Binary framing shared by the monitoring server and its clients (no Qt needed to decode it).
+    - Every frame is [u32 length][u8 kind][payload]:
+        - KIND_HELLO: utf-8 JSON with the graph, labels and sampling frequency of the published channels.
+        - KIND_SAMPLES: one tick of one graph, all channels together. The samples are quantized to `resolution`,
+          each channel sends its first value as int64 then int16 (or int32 when they do not fit) deltas.
+"""
+import json
+import struct
+import time
+
+import numpy as np
+
+DEFAULT_MONITOR_PORT = 5760
+KIND_HELLO = 0
+KIND_SAMPLES = 1
+ENCODING_INT16 = 1
+ENCODING_INT32 = 2
+
+LENGTH = struct.Struct("<I")
+# kind, encoding, graph, step, sequence, first sample index, send time, resolution, channels, samples per channel
+SAMPLES_HEADER = struct.Struct("<BBBHIQdfHI")
+
+
+def encode_hello(graph, labels, sampling_frequency):
+    payload = bytes([KIND_HELLO]) + json.dumps({"graph": graph, "labels": labels, "sampling_frequency": sampling_frequency}).encode("utf-8")
+    return LENGTH.pack(len(payload)) + payload
+
+
+def encode_samples(graph, sequence, start, values, resolution=1e-4, step=1):
+    """
+    Description:
+        - Encode a (channels, samples) block of one graph as a delta-encoded frame.
+    """
+    quantized = np.round(np.asarray(values, dtype=np.float64) / resolution).astype(np.int64)
+    n_channels, count = quantized.shape
+    deltas = np.diff(quantized, axis=1)
+    if deltas.size == 0 or np.abs(deltas).max() < 32768:
+        encoding, delta_type = ENCODING_INT16, "<i2"
+    else:
+        encoding, delta_type = ENCODING_INT32, "<i4"
+    payload = (SAMPLES_HEADER.pack(KIND_SAMPLES, encoding, graph, step, sequence, start, time.time(), resolution, n_channels, count)
+               + quantized[:, 0].astype("<i8").tobytes() + deltas.astype(delta_type).tobytes())
+    return LENGTH.pack(len(payload)) + payload
+
+
+def decode_frame(payload):
+    """
+    Description:
+        - Decode a frame payload (without its length prefix).
+    Returns:
+        - ("hello", dict) or ("samples", header dict, (channels, samples) float array)
+    """
+    if payload[0] == KIND_HELLO:
+        return "hello", json.loads(payload[1:].decode("utf-8"))
+    kind, encoding, graph, step, sequence, start, sent, resolution, n_channels, count = SAMPLES_HEADER.unpack_from(payload)
+    offset = SAMPLES_HEADER.size
+    first = np.frombuffer(payload, dtype="<i8", count=n_channels, offset=offset)
+    offset += 8 * n_channels
+    delta_type = "<i2" if encoding == ENCODING_INT16 else "<i4"
+    deltas = np.frombuffer(payload, dtype=delta_type, count=n_channels * max(count - 1, 0), offset=offset).reshape(n_channels, max(count - 1, 0))
+    quantized = np.concatenate([first[:, None], first[:, None] + np.cumsum(deltas, axis=1, dtype=np.int64)], axis=1)
+    header = {"graph": graph, "step": step, "sequence": sequence, "start": start, "sent": sent}
+    return "samples", header, quantized * float(np.float32(resolution))
+
+
+class FrameReader(object):
+    """
+    Description:
+        - Splits a byte stream into frame payloads.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        self._buffer += data
+        frames = []
+        while len(self._buffer) >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(self._buffer)
+            if len(self._buffer) < LENGTH.size + length:
+                break
+            frames.append(bytes(self._buffer[LENGTH.size: LENGTH.size + length]))
+            del self._buffer[: LENGTH.size + length]
+        return frames
@@ -0,0 +1,144 @@
+"""
+Description:
+    - Server mode: publishes the channels shown in the graphs to any number of local viewers over TCP.
+    - Headless synthetic server for benchmarks: python monitor_server.py --channels 16 --interval 20
+"""
+import argparse
+import sys
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication, QObject, QTimer
+from PyQt5.QtNetwork import QHostAddress, QTcpServer
+
+from monitor_protocol import DEFAULT_MONITOR_PORT, encode_hello, encode_samples
+
+
+class MonitorServer(QObject):
+    """
+    Description:
+        - Runs inside the Qt event loop and is driven by the plot clock: every tick of a graph becomes one frame.
+        - decimation 1 sends only the samples elapsed since the previous tick, a larger value sends the whole
+          displayed window with one sample out of `decimation`.
+        - Backpressure: a client whose socket still has more than max_pending_bytes queued skips frames
+          (frames are self-contained, so it just sees a gap in the sequence numbers). HELLO frames are never skipped,
+          a client could not decode anything without them.
+    """
+
+    def __init__(self, decimation=1, max_pending_bytes=1 << 20, resolution=1e-4):
+        super().__init__()
+        self.decimation = decimation
+        self.max_pending_bytes = max_pending_bytes
+        self.resolution = resolution
+        self.server = QTcpServer()
+        self.server.newConnection.connect(self._accept)
+        self.clients = []
+        self.sequence = 0
+        self.sent_frames = 0
+        self.dropped_frames = 0
+        self._hello = {}
+        self._heads = {}
+
+    def listen(self, port=DEFAULT_MONITOR_PORT):
+        return self.server.listen(QHostAddress.LocalHost, port)
+
+    def port(self):
+        return self.server.serverPort()
+
+    def close(self):
+        for client in self.clients:
+            client.disconnectFromHost()
+        self.clients = []
+        self.server.close()
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            client.disconnected.connect(lambda client=client: self._drop(client))
+            self.clients.append(client)
+            for hello in self._hello.values():
+                client.write(hello[1])
+
+    def _drop(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+        client.deleteLater()
+
+    def _broadcast(self, frame):
+        for client in self.clients:
+            if client.bytesToWrite() > self.max_pending_bytes:
+                self.dropped_frames += 1
+            else:
+                client.write(frame)
+                self.sent_frames += 1
+
+    def announce(self, graph, labels, sampling_frequency):
+        """
+        Description:
+            - Tell the clients which channels a graph publishes, only sent again when they change.
+        """
+        key = (tuple(labels), sampling_frequency)
+        if self._hello.get(graph, (None,))[0] != key:
+            self._hello[graph] = (key, encode_hello(graph, list(labels), sampling_frequency))
+            self._heads.pop(graph, None)
+            for client in self.clients:
+                client.write(self._hello[graph][1])
+
+    def publish_window(self, graph, position, signals, labels, sampling_frequency, window=200, offsets=None):
+        """
+        Description:
+            - Publish one tick of a graph whose displayed window is [position, position + window).
+            - Positions are on the graph's timeline, where each channel starts at its offset (0 by default); a frame
+              carries the part of the window where every channel has samples.
+        """
+        if not signals or not self.clients:
+            return
+        self.announce(graph, labels, sampling_frequency)
+        offsets = offsets or [0] * len(signals)
+        head = min(position + window, min(offset + len(samples) for offset, samples in zip(offsets, signals)))
+        if self.decimation > 1:
+            start, step = position, self.decimation
+        else:
+            start, step = self._heads.get(graph, position), 1
+            if not position <= start < head:
+                start = position
+        start = max(start, max(offsets))
+        if start >= head:
+            return
+        self._heads[graph] = head
+        values = np.array([np.asarray(samples[start - offset: head - offset])[::step] for offset, samples in zip(offsets, signals)])
+        if values.size == 0:
+            return
+        self.sequence += 1
+        self._broadcast(encode_samples(graph, self.sequence, start, values, self.resolution, step))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless monitoring server publishing synthetic channels.")
+    parser.add_argument("--port", type=int, default=DEFAULT_MONITOR_PORT)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--interval", type=int, default=20, help="clock tick in ms")
+    parser.add_argument("--decimation", type=int, default=1)
+    parser.add_argument("--sampling-frequency", type=float, default=125)
+    args = parser.parse_args()
+    app = QCoreApplication(sys.argv)
+    server = MonitorServer(decimation=args.decimation)
+    if not server.listen(args.port):
+        sys.exit(f"cannot listen on port {args.port}")
+    t = np.arange(10 ** 6) / args.sampling_frequency
+    signals = [np.sin(2 * np.pi * (1 + channel * 0.1) * t) for channel in range(args.channels)]
+    labels = ["ch" + str(channel) for channel in range(args.channels)]
+    clock = {"position": 0}
+
+    def tick():
+        server.publish_window(0, clock["position"], signals, labels, args.sampling_frequency)
+        clock["position"] = (clock["position"] + 1) % (len(t) - 200)
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    timer.start(args.interval)
+    print(f"serving {args.channels} channels on 127.0.0.1:{server.port()}")
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
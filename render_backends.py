@@ -0,0 +1,269 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore, QtWidgets
+
+
+class BatchedCurvesItem(pg.GraphicsObject):
+    """
+    Description:
+        - Draws every channel of a graph as one graphics item instead of one PlotDataItem per channel.
+        - Channels sharing a colour are concatenated into a single QPainterPath, a connect array breaks the
+          path between channels, so a frame costs one path build and one drawPath per colour.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._paths = []
+        self._pens = {}
+        self._bounds = QtCore.QRectF()
+
+    def pen(self, colour):
+        if colour not in self._pens:
+            self._pens[colour] = pg.mkPen(colour)
+        return self._pens[colour]
+
+    def set_curves(self, x_values, curves, colours, visibility):
+        """
+        Description:
+            - Replace the drawn channels.
+        Arg:
+            - x_values: time axis shared by all the channels of the frame.
+            - curves: list of y arrays with the same length as x_values.
+            - colours, visibility: per channel pen colour and show flag, as stored by the main window.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        groups = {}
+        for y_values, colour, visible in zip(curves, colours, visibility):
+            if visible:
+                groups.setdefault(colour, []).append(np.asarray(y_values, dtype=np.float64))
+        self.prepareGeometryChange()
+        self._paths = []
+        n_samples = len(x_values)
+        y_min, y_max = np.inf, -np.inf
+        for colour, ys in groups.items():
+            y = np.concatenate(ys)
+            x = np.tile(x_values, len(ys))
+            # 1 joins a sample to the next one, the last sample of every channel is left unconnected
+            connect = np.ones(len(y), dtype=bool)
+            connect[n_samples - 1::n_samples] = False
+            finite = np.isfinite(y)
+            if not finite.all():
+                # samples outside a channel's recording are NaN: no line from or to them
+                connect &= finite & np.append(finite[1:], False)
+                y = np.where(finite, y, 0.0)
+                if not finite.any():
+                    continue
+            self._paths.append((self.pen(colour), pg.arrayToQPath(x, y, connect=connect)))
+            y_min, y_max = min(y_min, y[finite].min()), max(y_max, y[finite].max())
+        if self._paths:
+            self._bounds = QtCore.QRectF(x_values[0], y_min, x_values[-1] - x_values[0], y_max - y_min)
+        else:
+            self._bounds = QtCore.QRectF()
+        self.update()
+
+    def clear(self):
+        self.set_curves([], [], [], [])
+
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, *args):
+        for pen, path in self._paths:
+            painter.setPen(pen)
+            painter.drawPath(path)
+
+
+class SweepTracesItem(pg.GraphicsObject):
+    """
+    Description:
+        - Bedside-monitor style sweep: the channels are written into a fixed circular buffer of window_length samples
+          and the x axis never moves, an erase gap ahead of the write head hides the previous sweep.
+        - The buffer is split into blocks with one cached path per (channel, block); a frame only rebuilds the blocks
+          touched by the new samples and the gap, and only repaints their rectangle, so the work follows the samples
+          added and not the window length.
+    """
+
+    def __init__(self, window_length, block_size=32, gap=10):
+        super().__init__()
+        self.window_length = window_length
+        self.block_size = block_size
+        self.gap = gap
+        self.erase_pen = pg.mkPen((150, 150, 150))
+        self._pens = {}
+        # paint() only draws the blocks inside option.exposedRect
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+        self.reset()
+
+    def reset(self, n_channels=0, sampling_frequency=1.0, window_length=None):
+        """
+        Description:
+            - Forget the current sweep, the next write starts a new one (of window_length samples when it is given).
+        """
+        self.prepareGeometryChange()
+        if window_length is not None:
+            self.window_length = window_length
+        self.n_blocks = -(-self.window_length // self.block_size)
+        self.n_channels = n_channels
+        self.sampling_frequency = sampling_frequency
+        self.head = None
+        self._buffer = np.full((n_channels, self.window_length), np.nan)
+        self._paths = {}
+        self._dirty = set(range(self.n_blocks))
+        self._colours = [None] * n_channels
+        self._visible = [True] * n_channels
+        self._y_range = (np.inf, -np.inf)
+        self.update()
+
+    def pen(self, colour):
+        if colour not in self._pens:
+            self._pens[colour] = pg.mkPen(colour)
+        return self._pens[colour]
+
+    def write(self, start, samples):
+        """
+        Description:
+            - Write the samples [start, start + k) of every channel at their place in the sweep and move the head.
+        Arg:
+            - start: absolute index of the first new sample.
+            - samples: one array of k new samples per channel.
+        """
+        n_new = len(samples[0]) if len(samples) else 0
+        if n_new == 0:
+            return
+        if n_new > self.window_length:
+            samples = [channel[-self.window_length:] for channel in samples]
+            start += n_new - self.window_length
+            n_new = self.window_length
+        indices = (start + np.arange(n_new)) % self.window_length
+        y_min, y_max = self._y_range
+        for channel, values in enumerate(samples):
+            values = np.asarray(values, dtype=np.float64)
+            self._buffer[channel, indices] = values
+            if not np.isnan(values).all():
+                y_min, y_max = min(y_min, np.nanmin(values)), max(y_max, np.nanmax(values))
+        gap_indices = (start + n_new + np.arange(self.gap)) % self.window_length
+        self._buffer[:, gap_indices] = np.nan
+        touched = np.concatenate([indices, gap_indices])
+        # block b also draws the first sample of block b + 1 to stay connected
+        first_of_block = touched[(touched % self.block_size == 0) & (touched > 0)]
+        self._dirty.update((touched // self.block_size).tolist())
+        self._dirty.update(((first_of_block - 1) // self.block_size).tolist())
+        self.head = start + n_new
+        if (y_min, y_max) != self._y_range:
+            self.prepareGeometryChange()
+            self._y_range = (y_min, y_max)
+            self.update()
+        else:
+            # the previous head bar is at start, the new one at the end of the gap
+            self._update_samples(start - 1, self.head + self.gap)
+
+    def _update_samples(self, first, stop):
+        """
+        Description:
+            - Repaint the part of the sweep showing the samples [first, stop) (absolute indices, wrapped on the window).
+        """
+        y_min, y_max = self._y_range
+        if stop - first >= self.window_length or y_min > y_max:
+            self.update()
+            return
+        length = stop - first
+        first %= self.window_length
+        for part_start, part_stop in ((first, min(first + length, self.window_length)), (0, first + length - self.window_length)):
+            if part_stop > part_start:
+                self.update(QtCore.QRectF((part_start - 1) / self.sampling_frequency, y_min,
+                                          (part_stop - part_start + 2) / self.sampling_frequency, y_max - y_min))
+
+    def set_style(self, colours, visibility):
+        if list(colours) != self._colours or list(visibility) != self._visible:
+            self._colours = list(colours)
+            self._visible = list(visibility)
+            self.update()
+
+    def _rebuild_dirty_blocks(self):
+        for block in self._dirty:
+            start = block * self.block_size
+            stop = min(start + self.block_size + 1, self.window_length)
+            x_values = np.arange(start, stop) / self.sampling_frequency
+            for channel in range(self.n_channels):
+                y_values = self._buffer[channel, start:stop]
+                if np.isfinite(y_values).any():
+                    self._paths[(channel, block)] = pg.arrayToQPath(x_values, y_values, connect='finite')
+                else:
+                    self._paths.pop((channel, block), None)
+        self._dirty.clear()
+
+    def boundingRect(self):
+        y_min, y_max = self._y_range
+        if self.head is None or y_min > y_max:
+            return QtCore.QRectF()
+        return QtCore.QRectF(0, y_min, self.window_length / self.sampling_frequency, y_max - y_min)
+
+    def paint(self, painter, option, *args):
+        if self.head is None:
+            return
+        self._rebuild_dirty_blocks()
+        # block b draws the samples [b * block_size, (b + 1) * block_size]
+        exposed = option.exposedRect
+        first_block = max(int(exposed.left() * self.sampling_frequency) // self.block_size - 1, 0)
+        last_block = min(int(np.ceil(exposed.right() * self.sampling_frequency)) // self.block_size, self.n_blocks - 1)
+        for channel in range(self.n_channels):
+            if not self._visible[channel]:
+                continue
+            painter.setPen(self.pen(self._colours[channel] or "red"))
+            for block in range(first_block, last_block + 1):
+                path = self._paths.get((channel, block))
+                if path is not None:
+                    painter.drawPath(path)
+        x_head = (self.head % self.window_length) / self.sampling_frequency
+        y_min, y_max = self._y_range
+        painter.setPen(self.erase_pen)
+        painter.drawLine(QtCore.QPointF(x_head, y_min), QtCore.QPointF(x_head, y_max))
+
+
+ANNOTATION_COLOURS = {"Alarm": (255, 60, 60), "Beat": (0, 200, 255), "Note": (255, 220, 0), "Artifact": (160, 160, 160), "Poor signal": (255, 140, 0)}
+
+
+class AnnotationsItem(pg.GraphicsObject):
+    """
+    Description:
+        - Marks the annotations visible in a graph: a vertical line for point events, a shaded band for intervals.
+        - Spans the whole height of the view, so it must be added with ignoreBounds=True.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._spans = []
+        self._pens = {kind: pg.mkPen(colour) for kind, colour in ANNOTATION_COLOURS.items()}
+        self._brushes = {kind: pg.mkBrush(colour + (60,)) for kind, colour in ANNOTATION_COLOURS.items()}
+        self._default_pen = pg.mkPen("w")
+        self._default_brush = pg.mkBrush(255, 255, 255, 60)
+
+    def set_spans(self, spans):
+        """
+        Description:
+            - spans: list of (x start, x end, kind) in plot coordinates, the item is only repainted when they change.
+        """
+        if spans != self._spans:
+            self.prepareGeometryChange()
+            self._spans = spans
+            self.update()
+
+    def boundingRect(self):
+        if not self._spans:
+            return QtCore.QRectF()
+        x_start = min(span[0] for span in self._spans)
+        x_end = max(span[1] for span in self._spans)
+        return QtCore.QRectF(x_start, -1e12, max(x_end - x_start, 1e-9), 2e12)
+
+    def paint(self, painter, *args):
+        view_box = self.getViewBox()
+        if view_box is None:
+            return
+        y_min, y_max = view_box.viewRange()[1]
+        for x_start, x_end, kind in self._spans:
+            painter.setPen(self._pens.get(kind, self._default_pen))
+            if x_end > x_start:
+                painter.setBrush(self._brushes.get(kind, self._default_brush))
+                painter.drawRect(QtCore.QRectF(x_start, y_min, x_end - x_start, y_max - y_min))
+            else:
+                painter.drawLine(QtCore.QPointF(x_start, y_min), QtCore.QPointF(x_start, y_max))
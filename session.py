@@ -0,0 +1,89 @@
+import json
+import os
+
+from channel_cache import file_fingerprint, load_channel, store_channel, store_extent
+from signal_readers import RecordChannel, open_record
+from view_range import extent_index, has_extent_index
+
+SESSION_VERSION = 1
+
+
+def describe_source(path, channel, sampling_frequency, start_time=None):
+    """
+    Description:
+        - Reference to one loaded signal: the recording path, its content hash, the channel inside it and the
+          absolute start time of the recording when it is known.
+    """
+    return {"path": os.path.abspath(path), "hash": recording_fingerprint(path), "channel": channel,
+            "sampling_frequency": sampling_frequency, "start_time": start_time.isoformat() if start_time else None}
+
+
+def recording_fingerprint(path, record=None):
+    """
+    Description:
+        - Content hash of every file of a recording, so a WFDB record also changes hash when only its samples change.
+    """
+    if path.lower().endswith(".csv"):
+        return file_fingerprint(path)
+    return file_fingerprint(*(record or open_record(path)).files)
+
+
+def cache_source(source, samples):
+    """
+    Description:
+        - Make sure a CSV signal can be re-opened from the binary cache instead of being parsed again.
+        - Binary recordings are already memory mapped, so they are not copied.
+        - The min/max block index goes with it when it is known, so the restored signal is not scanned either.
+    """
+    if not isinstance(samples, RecordChannel):
+        store_channel(samples, source["hash"], source["channel"])
+    index = extent_index(samples) if has_extent_index(samples) else None
+    if index is not None:
+        store_extent(index.block_minimum, index.block_maximum, source["hash"], source["channel"])
+
+
+def open_source(source, records=None):
+    """
+    Description:
+        - Re-attach a signal from its reference, preferring the memory-mapped cache.
+        - records: optional dict shared between calls so channels of the same binary recording reuse one reader.
+    Returns:
+        - (samples, sampling frequency)
+    """
+    if records is None:
+        records = {}
+    path = source["path"]
+    if isinstance(source["channel"], int):
+        if path not in records:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            record = open_record(path)
+            if recording_fingerprint(path, record) != source["hash"]:
+                raise ValueError(f"{path} changed since the session was saved")
+            records[path] = record
+        record = records[path]
+        return RecordChannel(record, source["channel"]), record.sampling_frequencies[source["channel"]]
+    samples = load_channel(source["hash"], source["channel"])
+    if samples is None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        if file_fingerprint(path) != source["hash"]:
+            raise ValueError(f"{path} changed since the session was saved")
+        import pandas as pd
+        samples = pd.read_csv(path, encoding='utf-8').fillna(0)[source["channel"]].values
+        store_channel(samples, source["hash"], source["channel"])
+    return samples, source.get("sampling_frequency", 125)
+
+
+def write_session(path, state):
+    state = dict(state, version=SESSION_VERSION)
+    with open(path, "w", encoding="utf-8") as session_file:
+        json.dump(state, session_file, separators=(",", ":"))
+
+
+def read_session(path):
+    with open(path, "r", encoding="utf-8") as session_file:
+        state = json.load(session_file)
+    if state.get("version") != SESSION_VERSION:
+        raise ValueError("unsupported session file version")
+    return state
@@ -0,0 +1,279 @@
+import weakref
+from collections import namedtuple
+
+import numpy as np
+
+# problems found in a chunk, combined as bit flags
+FLATLINE = 1
+CLIPPING = 2
+NOISE = 4
+MISSING = 8
+QUALITY_FLAGS = {FLATLINE: "flatline", CLIPPING: "clipping", NOISE: "noise", MISSING: "missing"}
+
+Statistics = namedtuple("Statistics", "mean std minimum maximum excluded")
+
+
+class QualityMap(object):
+    """
+    Description:
+        - Signal quality of a channel scored per chunk of chunk_size samples (one second of the channel's rate):
+          flatline (no change beyond flat_tolerance, held long enough, see chunk_flags()), clipping (samples piling up in a run at the recording's
+          minimum or maximum, see chunk_flags()),
+          noise (first-difference power close to white noise) and missing samples (NaN, or filled in while parsing).
+        - Keeps one flag byte, two float16 scores, the longest runs at the min and max, the samples just inside them
+          and the sum/sum of squares/min/max of every chunk, so the statistics of the good part of the signal come
+          from the chunks without reading the samples again.
+        - extend() scores samples as they arrive: the whole recording at load, or new samples of a live signal.
+    """
+
+    def __init__(self, chunk_size=125, flat_tolerance=1e-6, flat_run=3, still_run=10, clip_run=3, clip_band=0.1, resting_fraction=0.25, noise_ratio=0.8, missing_ratio=0.0):
+        self.chunk_size = int(chunk_size)
+        self.flat_tolerance = flat_tolerance
+        self.flat_run = flat_run
+        self.still_run = still_run
+        self.clip_run = clip_run
+        self.clip_band = clip_band
+        self.resting_fraction = resting_fraction
+        self.noise_ratio = noise_ratio
+        self.missing_ratio = missing_ratio
+        self.n_samples = 0
+        self.flags = np.zeros(0, dtype=np.uint8)
+        self.noise = np.zeros(0, dtype=np.float16)
+        self.missing = np.zeros(0, dtype=np.float16)
+        self.counts = np.zeros(0, dtype=np.int32)
+        self.sums = np.zeros(0)
+        self.squares = np.zeros(0)
+        self.minimum = np.zeros(0)
+        self.maximum = np.zeros(0)
+        self.bottom_runs = np.zeros(0, dtype=np.int32)
+        self.top_runs = np.zeros(0, dtype=np.int32)
+        self.bottom_bands = np.zeros(0, dtype=np.int32)
+        self.top_bands = np.zeros(0, dtype=np.int32)
+        self._clipped = None
+        self._flatline = None
+        self._pending = np.zeros(0)
+        self._pending_missing = np.zeros(0, dtype=bool)
+
+    @classmethod
+    def from_samples(cls, samples, chunk_size=125, block_size=1 << 20, **thresholds):
+        """
+        Description:
+            - Score a whole channel, read block by block so lazy channels are never fully decoded at once.
+        """
+        quality = cls(chunk_size, **thresholds)
+        block_size -= block_size % quality.chunk_size
+        for start in range(0, len(samples), block_size):
+            quality.extend(samples[start: start + block_size])
+        return quality
+
+    def extend(self, samples, missing=None):
+        """
+        Description:
+            - Add new samples; every chunk they complete is scored, the rest waits for the next call.
+            - missing: optional mask of samples that were filled in (e.g. by fillna) and are not real signal.
+        """
+        samples = np.asarray(samples, dtype=np.float64)
+        missing = np.isnan(samples) if missing is None else np.asarray(missing, dtype=bool) | np.isnan(samples)
+        self.n_samples += len(samples)
+        samples = np.concatenate([self._pending, samples])
+        missing = np.concatenate([self._pending_missing, missing])
+        n_scored = len(samples) // self.chunk_size * self.chunk_size
+        if n_scored:
+            self._score(samples[:n_scored].reshape(-1, self.chunk_size), missing[:n_scored].reshape(-1, self.chunk_size))
+        self._pending = samples[n_scored:]
+        self._pending_missing = missing[n_scored:]
+
+    def _score(self, chunks, missing):
+        valid = ~missing
+        counts = valid.sum(axis=1)
+        values = np.where(valid, chunks, 0.0)
+        sums = values.sum(axis=1)
+        squares = (values * values).sum(axis=1)
+        minimum = np.where(valid, chunks, np.inf).min(axis=1)
+        maximum = np.where(valid, chunks, -np.inf).max(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sums / counts
+            variance = np.maximum(squares / counts - mean * mean, 0)
+            # white noise has var(diff) = 2 var(x), physiological signals sampled fast enough are far below it
+            difference_variance = np.diff(values, axis=1).var(axis=1)
+            noise = np.where(variance > 0, difference_variance / (2 * variance), 0.0)
+        bottom = valid & (chunks <= minimum[:, None] + self.flat_tolerance)
+        top = valid & (chunks >= maximum[:, None] - self.flat_tolerance)
+        band = (self.clip_band * (maximum - minimum))[:, None]
+        bottom_bands = (valid & ~bottom & (chunks <= minimum[:, None] + band)).sum(axis=1)
+        top_bands = (valid & ~top & (chunks >= maximum[:, None] - band)).sum(axis=1)
+        missing_ratio = 1 - counts / self.chunk_size
+        flat = (maximum - minimum) <= self.flat_tolerance
+        flags = np.zeros(len(chunks), dtype=np.uint8)
+        flags[~flat & (noise >= self.noise_ratio)] |= NOISE
+        flags[(missing_ratio > self.missing_ratio) | (counts == 0)] |= MISSING
+        self.flags = np.concatenate([self.flags, flags])
+        self.noise = np.concatenate([self.noise, np.nan_to_num(noise).astype(np.float16)])
+        self.missing = np.concatenate([self.missing, missing_ratio.astype(np.float16)])
+        self.counts = np.concatenate([self.counts, counts.astype(np.int32)])
+        self.sums = np.concatenate([self.sums, sums])
+        self.squares = np.concatenate([self.squares, squares])
+        self.minimum = np.concatenate([self.minimum, minimum])
+        self.maximum = np.concatenate([self.maximum, maximum])
+        self.bottom_runs = np.concatenate([self.bottom_runs, longest_runs(bottom).astype(np.int32)])
+        self.top_runs = np.concatenate([self.top_runs, longest_runs(top).astype(np.int32)])
+        self.bottom_bands = np.concatenate([self.bottom_bands, bottom_bands.astype(np.int32)])
+        self.top_bands = np.concatenate([self.top_bands, top_bands.astype(np.int32)])
+        # the extremes of the recording may have moved, a flat run may have grown
+        self._clipped = None
+        self._flatline = None
+
+    def chunk_flags(self, first=0, last=None):
+        """
+        Description:
+            - Flags of chunks [first, last), CLIPPING included.
+            - A chunk is clipped when it stays at the recording's minimum or maximum for clip_run samples in a row,
+              and that extreme is a rail: over the recording, more samples pile up at it than in the clip_band of the
+              chunks' range just inside it (a clean signal slows down into its extremes, a clipped one is cut off).
+            - An extreme held for more than resting_fraction of the recording is where the signal rests (the baseline
+              of an ECG, the floor of a capnogram) and not a rail.
+            - A chunk without any change is a flatline when its run of such chunks lasts flat_run chunks at a level
+              outside the range of the chunks around the run (a pressure dropping to 0), or still_run chunks at any
+              level. Shorter runs within the signal's range are the signal resting between beats or breaths.
+        """
+        if self._clipped is None:
+            self._clipped = self._rail_chunks(-self.minimum, self.bottom_runs, self.bottom_bands) | \
+                            self._rail_chunks(self.maximum, self.top_runs, self.top_bands)
+        if self._flatline is None:
+            self._flatline = self._flatline_chunks()
+        flat = (self.counts[first:last] > 0) & (self.maximum[first:last] - self.minimum[first:last] <= self.flat_tolerance)
+        clipped = self._clipped[first:last] & ~flat
+        return self.flags[first:last] | np.where(self._flatline[first:last], FLATLINE, 0).astype(np.uint8) | \
+            np.where(clipped, CLIPPING, 0).astype(np.uint8)
+
+    def _flatline_chunks(self):
+        flat = (self.counts > 0) & (self.maximum - self.minimum <= self.flat_tolerance)
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], flat, [False])).astype(np.int8)))
+        starts, ends = edges[0::2], edges[1::2]
+        if not len(starts):
+            return np.zeros(len(flat), dtype=bool)
+        # range of the chunk before and the chunk after every run (a run at either end of the recording has one)
+        before = np.maximum(starts - 1, 0)
+        after = np.minimum(ends, len(flat) - 1)
+        low = np.minimum(np.where(starts > 0, self.minimum[before], np.inf), np.where(ends < len(flat), self.minimum[after], np.inf))
+        high = np.maximum(np.where(starts > 0, self.maximum[before], -np.inf), np.where(ends < len(flat), self.maximum[after], -np.inf))
+        level = self.minimum[starts]
+        outside = (level < low - self.flat_tolerance) | (level > high + self.flat_tolerance)
+        lengths = ends - starts
+        held = ((lengths >= self.flat_run) & outside) | (lengths >= self.still_run)
+        marks = np.zeros(len(flat) + 1, dtype=np.int64)
+        np.add.at(marks, starts[held], 1)
+        np.add.at(marks, ends[held], -1)
+        return np.cumsum(marks[:-1]) > 0
+
+    def _rail_chunks(self, extremes, runs, bands):
+        # chunks reaching the rail, the maximum of extremes (the minima are passed negated)
+        at_rail = extremes >= extremes.max(initial=-np.inf) - self.flat_tolerance
+        held = runs[at_rail].sum()
+        if held < bands[at_rail].sum() or held > self.resting_fraction * self.counts.sum():
+            return np.zeros(len(extremes), dtype=bool)
+        return at_rail & (runs >= self.clip_run)
+
+    def bad_spans(self, start, stop):
+        """
+        Description:
+            - Runs of flagged chunks overlapping samples [start, stop), clipped to it.
+        Returns:
+            - list of (first sample, end sample, combined flags)
+        """
+        first = max(start, 0) // self.chunk_size
+        last = min(-(-stop // self.chunk_size), len(self.flags))
+        if last <= first:
+            return []
+        flags = self.chunk_flags(first, last)
+        bad = flags != 0
+        if not bad.any():
+            return []
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], bad, [False])).astype(np.int8)))
+        spans = []
+        for run_start, run_end in zip(edges[0::2], edges[1::2]):
+            span_start = max((first + run_start) * self.chunk_size, start)
+            span_end = min((first + run_end) * self.chunk_size, stop)
+            spans.append((span_start, span_end, int(np.bitwise_or.reduce(flags[run_start:run_end]))))
+        return spans
+
+    def statistics(self):
+        """
+        Description:
+            - Mean, std, min and max over the chunks without any flag (plus the samples not scored yet).
+        Returns:
+            - Statistics, with excluded = number of samples left out; the values are NaN when nothing is left.
+        """
+        good = self.chunk_flags() == 0
+        pending = self._pending[~self._pending_missing]
+        count = self.counts[good].sum() + len(pending)
+        excluded = self.n_samples - count
+        if count == 0:
+            return Statistics(np.nan, np.nan, np.nan, np.nan, excluded)
+        total = self.sums[good].sum() + pending.sum()
+        squares = self.squares[good].sum() + (pending * pending).sum()
+        mean = total / count
+        minimum = min(self.minimum[good].min(initial=np.inf), pending.min(initial=np.inf))
+        maximum = max(self.maximum[good].max(initial=-np.inf), pending.max(initial=-np.inf))
+        return Statistics(mean, np.sqrt(max(squares / count - mean * mean, 0)), minimum, maximum, excluded)
+
+
+def longest_runs(mask):
+    """
+    Description:
+        - Length of the longest run of True in each row of a 2D mask.
+    """
+    if mask.size == 0:
+        return np.zeros(len(mask), dtype=np.int64)
+    index = np.arange(mask.shape[1])
+    # position of the last False up to each sample, so index - last_reset is the length of the run ending there
+    last_reset = np.maximum.accumulate(np.where(mask, -1, index), axis=1)
+    return np.where(mask, index - last_reset, 0).max(axis=1)
+
+
+def rate_chunk_size(sampling_frequency):
+    """
+    Description:
+        - Chunk length of a channel: one second of samples at its sampling frequency.
+    """
+    return max(int(round(sampling_frequency)), 1)
+
+
+_maps = {}
+
+
+def quality_map(samples, chunk_size=125):
+    """
+    Description:
+        - The QualityMap of a loaded signal, computed the first time it is needed and kept while the signal is alive.
+        - None while a worker scores it (see defer_quality_map).
+    """
+    if not has_quality_map(samples):
+        register_quality_map(samples, QualityMap.from_samples(samples, chunk_size))
+    return _maps[id(samples)][1]
+
+
+def has_quality_map(samples):
+    """
+    Description:
+        - Whether the map of a signal is known or being scored, without scoring it.
+    """
+    entry = _maps.get(id(samples))
+    return entry is not None and entry[0]() is samples
+
+
+def defer_quality_map(samples):
+    """
+    Description:
+        - Mark the map of a signal as being scored elsewhere: until it is registered, nothing of the signal is shaded.
+    """
+    register_quality_map(samples, None)
+
+
+def register_quality_map(samples, quality):
+    """
+    Description:
+        - Seed the cache with a map computed elsewhere (e.g. by the worker that parsed the signal).
+    """
+    key = id(samples)
+    _maps[key] = (weakref.ref(samples, lambda _, key=key: _maps.pop(key, None)), quality)
@@ -0,0 +1,283 @@
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+
+
+class RecordChannel(object):
+    """
+    Description:
+        - Lazy view over one channel of a binary recording.
+        - Slicing decodes only the requested samples from the memory-mapped file and returns physical units.
+        - Behaves enough like a 1-D numpy array (len, slicing, np.asarray) to be stored next to the CSV arrays.
+    """
+
+    def __init__(self, record, index):
+        self.record = record
+        self.index = index
+        self.label = record.labels[index]
+        self.units = record.units[index]
+        self.sampling_frequency = record.sampling_frequencies[index]
+
+    def __len__(self):
+        return self.record.lengths[self.index]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            values = self.record.read(self.index, start, max(start, stop))
+            return values[::step] if step != 1 else values
+        if key < 0:
+            key += len(self)
+        if key < 0 or key >= len(self):
+            raise IndexError("sample index out of range")
+        return self.record.read(self.index, key, key + 1)[0]
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.record.read(self.index, 0, len(self))
+        return values if dtype is None else values.astype(dtype)
+
+
+class WfdbRecord(object):
+    """
+    Description:
+        - MIT-BIH WFDB record (.hea header + .dat signal files) read through numpy memory maps.
+        - Supports the common storage formats 16, 212 and 80; gain and baseline come from the header.
+    """
+    SUPPORTED_FORMATS = (16, 212, 80)
+
+    def __init__(self, header_path):
+        self.path = header_path
+        self.directory = os.path.dirname(os.path.abspath(header_path))
+        self.labels = []
+        self.units = []
+        self.gains = []
+        self.baselines = []
+        self.start_time = None
+        self._signals = []
+        self._maps = {}
+        self._parse_header()
+        self.lengths = [self.samples_per_signal] * len(self.labels)
+        self.sampling_frequencies = [self.sampling_frequency] * len(self.labels)
+
+    @property
+    def files(self):
+        """
+        Description:
+            - The header followed by the signal files it refers to.
+        """
+        return [self.path] + [os.path.join(self.directory, file_name) for file_name in self._file_layout]
+
+    def _parse_header(self):
+        with open(self.path, "r", encoding="latin-1") as header:
+            lines = [line.strip() for line in header if line.strip() and not line.startswith("#")]
+        record_line = lines[0].split()
+        if "/" in record_line[0]:
+            raise ValueError("multi-segment WFDB records are not supported")
+        n_signals = int(record_line[1])
+        self.sampling_frequency = float(record_line[2].split("/")[0].split("(")[0]) if len(record_line) > 2 else 250.0
+        self.samples_per_signal = int(record_line[3]) if len(record_line) > 3 else 0
+        if len(record_line) > 5:
+            try:
+                self.start_time = datetime.strptime(record_line[5] + " " + record_line[4].split(".")[0], "%d/%m/%Y %H:%M:%S")
+            except ValueError:
+                self.start_time = None
+
+        for line in lines[1:1 + n_signals]:
+            fields = line.split()
+            file_name = fields[0]
+            fmt_field = re.match(r"(\d+)(?:x\d+)?(?::\d+)?(?:\+(\d+))?", fields[1])
+            fmt = int(fmt_field.group(1))
+            if fmt not in self.SUPPORTED_FORMATS:
+                raise ValueError(f"WFDB format {fmt} is not supported")
+            byte_offset = int(fmt_field.group(2) or 0)
+            gain, baseline, units = 200.0, None, "mV"
+            if len(fields) > 2:
+                gain_field = re.match(r"([-\d.eE+]+)(?:\((-?\d+)\))?(?:/(\S+))?", fields[2])
+                gain = float(gain_field.group(1)) or 200.0
+                if gain_field.group(2) is not None:
+                    baseline = int(gain_field.group(2))
+                if gain_field.group(3):
+                    units = gain_field.group(3)
+            adc_zero = int(fields[4]) if len(fields) > 4 else 0
+            if baseline is None:
+                baseline = adc_zero
+            self.labels.append(" ".join(fields[8:]) if len(fields) > 8 else "signal" + str(len(self.labels)))
+            self.units.append(units)
+            self.gains.append(gain)
+            self.baselines.append(baseline)
+            self._signals.append((file_name, fmt, byte_offset))
+
+        # signals stored in the same .dat file are interleaved frame by frame
+        self._file_layout = {}
+        for index, (file_name, fmt, byte_offset) in enumerate(self._signals):
+            self._file_layout.setdefault(file_name, []).append(index)
+
+        if self.samples_per_signal == 0 and self._signals:
+            file_name, fmt, byte_offset = self._signals[0]
+            n_in_file = len(self._file_layout[file_name])
+            n_bytes = os.path.getsize(os.path.join(self.directory, file_name)) - byte_offset
+            bits = {16: 16, 212: 12, 80: 8}[fmt]
+            self.samples_per_signal = n_bytes * 8 // (bits * n_in_file)
+
+        for file_name, members in self._file_layout.items():
+            fmt, byte_offset = self._signals[members[0]][1:]
+            n_bytes = -(-self.samples_per_signal * len(members) * {16: 16, 212: 12, 80: 8}[fmt] // 8)
+            if os.path.getsize(os.path.join(self.directory, file_name)) < byte_offset + n_bytes:
+                raise ValueError(f"{file_name} is shorter than its header says, the record is truncated")
+
+    def _memmap(self, file_name, fmt, byte_offset):
+        key = (file_name, byte_offset)
+        if key not in self._maps:
+            dtype = np.dtype("<i2") if fmt == 16 else np.uint8
+            self._maps[key] = np.memmap(os.path.join(self.directory, file_name), dtype=dtype, mode="r", offset=byte_offset)
+        return self._maps[key]
+
+    def read_digital(self, index, start, stop):
+        """
+        Description:
+            - Decode the raw ADC values of samples [start, stop) of one signal.
+        """
+        file_name, fmt, byte_offset = self._signals[index]
+        members = self._file_layout[file_name]
+        n_in_file = len(members)
+        column = members.index(index)
+        data = self._memmap(file_name, fmt, byte_offset)
+        if fmt == 16:
+            return np.asarray(data[start * n_in_file + column: stop * n_in_file: n_in_file], dtype=np.int32)
+        if fmt == 80:
+            return np.asarray(data[start * n_in_file + column: stop * n_in_file: n_in_file], dtype=np.int32) - 128
+        # format 212: two 12-bit samples packed into three bytes over the flattened frame stream
+        flat_start = start * n_in_file
+        flat_stop = stop * n_in_file
+        pair_start = flat_start // 2
+        pair_stop = (flat_stop + 1) // 2
+        packed = np.asarray(data[pair_start * 3: pair_stop * 3])
+        packed = packed[: len(packed) // 3 * 3].reshape(-1, 3).astype(np.int32)
+        flat = np.empty(len(packed) * 2, dtype=np.int32)
+        flat[0::2] = packed[:, 0] | ((packed[:, 1] & 0x0F) << 8)
+        flat[1::2] = packed[:, 2] | ((packed[:, 1] & 0xF0) << 4)
+        flat[flat > 2047] -= 4096
+        offset = flat_start - pair_start * 2
+        return flat[offset + column: offset + (flat_stop - flat_start): n_in_file]
+
+    def read(self, index, start, stop):
+        """
+        Description:
+            - Samples [start, stop) of one signal in physical units.
+        """
+        digital = self.read_digital(index, start, stop)
+        return (digital - self.baselines[index]) / self.gains[index]
+
+    def channels(self):
+        return [RecordChannel(self, index) for index in range(len(self.labels))]
+
+
+class EdfRecord(object):
+    """
+    Description:
+        - European Data Format (EDF/EDF+) recording read through a numpy memory map of the 16-bit data records.
+        - Physical values use the physical/digital min and max of each signal header.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.labels = []
+        self.units = []
+        self.gains = []
+        self.baselines = []
+        self._parse_header()
+
+    def _parse_header(self):
+        with open(self.path, "rb") as edf:
+            fixed = edf.read(256).decode("latin-1")
+            n_signals = int(fixed[252:256])
+            signal_header = edf.read(256 * n_signals).decode("latin-1")
+        self.header_bytes = int(fixed[184:192])
+        n_records = int(fixed[236:244])
+        self.record_duration = float(fixed[244:252]) or 1.0
+        try:
+            self.start_time = datetime.strptime(fixed[168:176] + " " + fixed[176:184], "%d.%m.%y %H.%M.%S")
+        except ValueError:
+            self.start_time = None
+
+        # each header field is stored for all signals before the next field starts
+        offset = 0
+        columns = {}
+        for name, width in (("label", 16), ("transducer", 80), ("units", 8), ("physical_min", 8), ("physical_max", 8),
+                            ("digital_min", 8), ("digital_max", 8), ("prefilter", 80), ("samples", 8)):
+            columns[name] = [signal_header[offset + i * width: offset + (i + 1) * width].strip() for i in range(n_signals)]
+            offset += width * n_signals
+
+        samples_per_record = [int(n) for n in columns["samples"]]
+        self.record_size = sum(samples_per_record)
+        if n_records < 0:
+            n_records = (os.path.getsize(self.path) - self.header_bytes) // (2 * self.record_size)
+        self.n_records = n_records
+        if os.path.getsize(self.path) < self.header_bytes + 2 * self.record_size * n_records:
+            raise ValueError(f"{os.path.basename(self.path)} is shorter than its header says, the recording is truncated")
+
+        # keep only the ordinary signals, EDF+ annotation channels are not waveforms
+        self._columns = []
+        self.lengths = []
+        self.sampling_frequencies = []
+        column_offset = 0
+        for i in range(n_signals):
+            if columns["label"][i] != "EDF Annotations":
+                physical_min, physical_max = float(columns["physical_min"][i]), float(columns["physical_max"][i])
+                digital_min, digital_max = float(columns["digital_min"][i]), float(columns["digital_max"][i])
+                gain = (physical_max - physical_min) / (digital_max - digital_min)
+                self.labels.append(columns["label"][i])
+                self.units.append(columns["units"][i])
+                self.gains.append(gain)
+                self.baselines.append(physical_min - digital_min * gain)
+                self._columns.append((column_offset, samples_per_record[i]))
+                self.lengths.append(samples_per_record[i] * n_records)
+                self.sampling_frequencies.append(samples_per_record[i] / self.record_duration)
+            column_offset += samples_per_record[i]
+        self._data = None
+
+    def _memmap(self):
+        if self._data is None:
+            self._data = np.memmap(self.path, dtype="<i2", mode="r", offset=self.header_bytes,
+                                   shape=(self.n_records, self.record_size))
+        return self._data
+
+    def read(self, index, start, stop):
+        """
+        Description:
+            - Samples [start, stop) of one signal in physical units, touching only the data records that cover them.
+        """
+        column_offset, per_record = self._columns[index]
+        first_record = start // per_record
+        last_record = max(first_record, (stop - 1) // per_record + 1)
+        block = self._memmap()[first_record:last_record, column_offset: column_offset + per_record]
+        digital = np.asarray(block).reshape(-1)
+        digital = digital[start - first_record * per_record: stop - first_record * per_record]
+        return digital * self.gains[index] + self.baselines[index]
+
+    def channels(self):
+        return [RecordChannel(self, index) for index in range(len(self.labels))]
+
+    @property
+    def files(self):
+        return [self.path]
+
+
+def open_record(path):
+    """
+    Description:
+        - Open a binary recording by extension and return its reader (WFDB header or EDF file).
+        - Raises ValueError for unsupported, malformed or truncated recordings and OSError when a file is missing.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in (".hea", ".dat", ".edf", ".edf+"):
+        raise ValueError(f"unsupported recording type: {extension}")
+    try:
+        if extension in (".hea", ".dat"):
+            return WfdbRecord(os.path.splitext(path)[0] + ".hea")
+        return EdfRecord(path)
+    except (IndexError, KeyError, AttributeError, ZeroDivisionError) as error:
+        # a field missing or out of place in the header
+        raise ValueError(f"malformed header in {os.path.basename(path)}") from error
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore
+
+import instrumentation
+
+
+def compute_tile(samples, nfft, hop, n_frames):
+    """
+    Description:
+        - Worker task: power spectrum (dB) of n_frames Hann-windowed frames starting every `hop` samples.
+        - Frames running past the end of the samples are zero padded.
+    Returns:
+        - float32 array (n_frames, nfft // 2 + 1)
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    needed = (n_frames - 1) * hop + nfft
+    if len(samples) < needed:
+        samples = np.concatenate([samples, np.zeros(needed - len(samples))])
+    frames = np.lib.stride_tricks.sliding_window_view(samples, nfft)[::hop][:n_frames]
+    frames = (frames - frames.mean(axis=1, keepdims=True)) * np.hanning(nfft)
+    power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+    return (10 * np.log10(power + 1e-12)).astype(np.float32)
+
+
+class SpectrogramTiles(object):
+    """
+    Description:
+        - Bounded LRU store of STFT tiles keyed by (channel, tile index, nfft).
+        - A tile holds frames_per_tile consecutive frames, so a given time block is only ever computed once.
+    """
+
+    def __init__(self, nfft=64, hop=16, frames_per_tile=64, max_tiles=512):
+        self.nfft = nfft
+        self.hop = hop
+        self.frames_per_tile = frames_per_tile
+        self.samples_per_tile = frames_per_tile * hop
+        self.max_tiles = max_tiles
+        self.pending = set()
+        self._tiles = OrderedDict()
+
+    def tile_range(self, start, stop):
+        return max(start, 0) // self.samples_per_tile, max(stop - 1, 0) // self.samples_per_tile
+
+    def tile_samples(self, samples, tile):
+        start = tile * self.samples_per_tile
+        return np.asarray(samples[start: start + self.samples_per_tile - self.hop + self.nfft])
+
+    def get(self, key):
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        self.pending.discard(key)
+        self._tiles[key] = tile
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+
+
+class SpectrogramPanel(object):
+    """
+    Description:
+        - Spectrogram of one channel under a graph, drawn with a single ImageItem and x-linked to the graph.
+        - Tiles missing for the shown window are built on the worker pool; the image is redrawn when they arrive
+          and otherwise only when the shown tiles change.
+    """
+
+    def __init__(self, linked_widget, tiles):
+        self.tiles = tiles
+        self.widget = pg.PlotWidget()
+        self.widget.setMaximumHeight(160)
+        self.widget.setLabel('left', 'Frequency (Hz)')
+        self.widget.setXLink(linked_widget)
+        self.image = pg.ImageItem()
+        self.image.setColorMap(pg.colormap.get("viridis"))
+        self.widget.addItem(self.image)
+        self._request = None
+        self._shown = None
+
+    def show_window(self, channel_key, samples, start, stop, sampling_frequency, submit, time_offset=0.0):
+        """
+        Description:
+            - Show the spectrogram of samples [start, stop), requesting the missing tiles through
+              submit(callback, task, *args, error_callback=...); a tile that failed is requested again next time.
+            - time_offset: time of the channel's first sample on the graph's time axis.
+        """
+        first, last = self.tiles.tile_range(max(start, 0), max(min(stop, len(samples)), 1))
+        for tile in range(first, last + 1):
+            key = (channel_key, tile, self.tiles.nfft)
+            if key not in self.tiles.pending and self.tiles.get(key) is None:
+                self.tiles.pending.add(key)
+                submit(lambda result, key=key: self._tile_ready(key, result), compute_tile,
+                       self.tiles.tile_samples(samples, tile), self.tiles.nfft, self.tiles.hop, self.tiles.frames_per_tile,
+                       error_callback=lambda error, key=key: self._tile_failed(key, error))
+        self._request = (channel_key, first, last, sampling_frequency, time_offset)
+        self._render()
+
+    def _tile_ready(self, key, tile):
+        self.tiles.put(key, tile)
+        self._render()
+
+    def _tile_failed(self, key, error):
+        self.tiles.pending.discard(key)
+        instrumentation.logger.warning("spectrogram tile %s failed: %s", key[1:], error)
+
+    def _render(self):
+        if self._request is None:
+            return
+        channel_key, first, last, sampling_frequency, time_offset = self._request
+        tiles = [self.tiles.get((channel_key, tile, self.tiles.nfft)) for tile in range(first, last + 1)]
+        shown = (channel_key, first, last, time_offset, tuple(tile is not None for tile in tiles))
+        if shown == self._shown or not any(tile is not None for tile in tiles):
+            return
+        self._shown = shown
+        blank = np.full((self.tiles.frames_per_tile, self.tiles.nfft // 2 + 1), np.nan, dtype=np.float32)
+        image = np.concatenate([tile if tile is not None else blank for tile in tiles])
+        self.image.setImage(image, autoLevels=True)
+        x_start = time_offset + first * self.tiles.samples_per_tile / sampling_frequency
+        self.image.setRect(QtCore.QRectF(x_start, 0, len(image) * self.tiles.hop / sampling_frequency, sampling_frequency / 2))
+        self.widget.setYRange(0, sampling_frequency / 2, padding=0)
+
+    def clear(self):
+        self._request = None
+        self._shown = None
+        self.image.clear()
@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+
+SEARCH_EXTENSIONS = (".csv", ".hea", ".edf")
+
+
+def normalized_cross_correlation(signal, template, chunk_size=1 << 16):
+    """
+    Description:
+        - Pearson correlation between the template and every window of the signal, computed chunk by chunk with FFTs
+          (overlap-save) so only chunk_size + len(template) samples are in memory at a time.
+        - Works on arrays and on lazy channels (only slicing is used).
+    Yields:
+        - (first window index of the chunk, scores of the chunk's windows)
+    """
+    template = np.asarray(template, dtype=np.float64)
+    m = len(template)
+    centered = template - template.mean()
+    template_norm = np.sqrt(np.dot(centered, centered))
+    n_windows = len(signal) - m + 1
+    if m < 2 or n_windows < 1 or template_norm == 0:
+        return
+    nfft = 1 << int(np.ceil(np.log2(chunk_size + m - 1)))
+    chunk_size = nfft - m + 1
+    template_spectrum = np.conj(np.fft.rfft(centered, nfft))
+    for start in range(0, n_windows, chunk_size):
+        stop = min(start + chunk_size, n_windows)
+        x = np.asarray(signal[start: stop + m - 1], dtype=np.float64)
+        n_chunk = stop - start
+        correlation = np.fft.irfft(np.fft.rfft(x, nfft) * template_spectrum, nfft)[:n_chunk]
+        # window sums from cumulative sums give each window's energy around its own mean
+        sums = np.concatenate(([0.0], np.cumsum(x)))
+        squares = np.concatenate(([0.0], np.cumsum(x * x)))
+        window_sum = sums[m: m + n_chunk] - sums[:n_chunk]
+        window_energy = squares[m: m + n_chunk] - squares[:n_chunk] - window_sum * window_sum / m
+        denominator = np.sqrt(np.maximum(window_energy, 0)) * template_norm
+        scores = np.zeros(n_chunk)
+        valid = denominator > 1e-12 * template_norm
+        scores[valid] = correlation[valid] / denominator[valid]
+        yield start, scores
+
+
+def best_matches(signal, template, top_k=10, chunk_size=1 << 16):
+    """
+    Description:
+        - Best non-overlapping matches of the template in one signal.
+    Returns:
+        - list of (score, start index), best first.
+    """
+    m = len(template)
+    block = max(m // 2, 1)
+    candidates = []
+    for start, scores in normalized_cross_correlation(signal, template, chunk_size):
+        # one candidate per half-template block keeps the candidate list small before suppression
+        n_blocks = -(-len(scores) // block)
+        padded = np.full(n_blocks * block, -np.inf)
+        padded[:len(scores)] = scores
+        blocks = padded.reshape(n_blocks, block)
+        peaks = blocks.argmax(axis=1)
+        peak_scores = blocks[np.arange(n_blocks), peaks]
+        keep = np.argsort(peak_scores)[::-1][: top_k * 2]
+        candidates.extend((peak_scores[i], start + i * block + peaks[i]) for i in keep)
+    return suppress_overlaps(candidates, m, top_k)
+
+
+def suppress_overlaps(candidates, template_length, top_k):
+    chosen = []
+    for score, start in sorted(candidates, reverse=True):
+        if all(abs(start - other) >= template_length for _, other in chosen):
+            chosen.append((float(score), int(start)))
+            if len(chosen) == top_k:
+                break
+    return chosen
+
+
+def search_signals(signals, template, top_k=10, exclude=None):
+    """
+    Description:
+        - Rank matches over several signals.
+        - signals: list of (key, samples); exclude: optional (key, start) of the template itself.
+    Returns:
+        - list of (score, key, start), best first.
+    """
+    results = []
+    for key, samples in signals:
+        for score, start in best_matches(samples, template, top_k + 1):
+            if exclude is not None and key == exclude[0] and abs(start - exclude[1]) < len(template):
+                continue
+            results.append((score, key, start))
+    results.sort(key=lambda result: result[0], reverse=True)
+    return results[:top_k]
+
+
+def resample(template, sampling_frequency, target_frequency):
+    """
+    Description:
+        - The template at another sampling rate (linear interpolation), so it keeps its duration in a recording
+          sampled differently.
+    """
+    if target_frequency == sampling_frequency:
+        return template
+    n_samples = max(int(round(len(template) * target_frequency / sampling_frequency)), 2)
+    return np.interp(np.linspace(0, len(template) - 1, n_samples), np.arange(len(template)), template)
+
+
+def search_channels(channels, template, sampling_frequency, top_k=10, exclude=None):
+    """
+    Description:
+        - Worker task: search_signals over loaded signals given as (key, spec, sampling frequency) (see
+          export.channel_spec); the template is resampled to the rate of each channel.
+    """
+    from export import open_spec
+    results = []
+    for channel_frequency in sorted({rate for _, _, rate in channels}):
+        same_rate = [(key, open_spec(spec)) for key, spec, rate in channels if rate == channel_frequency]
+        results.extend(search_signals(same_rate, resample(template, sampling_frequency, channel_frequency), top_k, exclude))
+    results.sort(key=lambda result: result[0], reverse=True)
+    return results[:top_k]
+
+
+def search_folder(directory, template, sampling_frequency, top_k=10):
+    """
+    Description:
+        - Worker task: search every recording of a folder (CSV, WFDB, EDF) for the template.
+        - The template is resampled to the rate of each channel; CSV files are read at 125 Hz like in the viewer.
+        - Binary recordings are read lazily, so memory stays bounded by the search chunk.
+    Returns:
+        - list of (score, (path, channel, label, sampling frequency), start), best first; channel is the column
+          name of a CSV file or the channel index of a binary recording.
+    """
+    import pandas as pd
+    from signal_readers import open_record
+    results = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        extension = os.path.splitext(name)[1].lower()
+        if extension not in SEARCH_EXTENSIONS:
+            continue
+        try:
+            if extension == ".csv":
+                signals = [((path, "Voltage", "Voltage", 125), pd.read_csv(path, encoding='utf-8').fillna(0)["Voltage"].values)]
+            else:
+                record = open_record(path)
+                signals = [((path, channel.index, channel.label, channel.sampling_frequency), channel) for channel in record.channels()]
+        except (OSError, ValueError, KeyError):
+            continue
+        for channel_frequency in sorted({key[3] for key, _ in signals}):
+            same_rate = [(key, samples) for key, samples in signals if key[3] == channel_frequency]
+            results.extend(search_signals(same_rate, resample(template, sampling_frequency, channel_frequency), top_k))
+    results.sort(key=lambda result: result[0], reverse=True)
+    return results[:top_k]
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import numpy as np
+
+
+def channel_start(source):
+    """
+    Description:
+        - Absolute start time of a channel, kept in its source as an ISO string (None when unknown).
+    """
+    if source is None or not source.get("start_time"):
+        return None
+    return datetime.fromisoformat(source["start_time"])
+
+
+def channel_rate(source, default):
+    """
+    Description:
+        - Sampling frequency of a channel, kept in its source (default for signals without one).
+    """
+    if source is None or not source.get("sampling_frequency"):
+        return default
+    return source["sampling_frequency"]
+
+
+def sources_rates(sources, default):
+    return {channel_rate(source, default) for source in sources}
+
+
+def earliest_start(sources):
+    starts = [start for start in (channel_start(source) for source in sources) if start is not None]
+    return min(starts) if starts else None
+
+
+def aligned_window(samples, start, length):
+    """
+    Description:
+        - Samples [start, start + length) of a channel; the part before its first or after its last sample is NaN.
+    """
+    if 0 <= start and start + length <= len(samples):
+        return samples[start: start + length]
+    values = np.full(length, np.nan)
+    first, last = max(start, 0), min(start + length, len(samples))
+    if last > first:
+        values[first - start: last - start] = samples[first:last]
+    return values
+
+
+class Timeline(object):
+    """
+    Description:
+        - Wall-clock timeline of one graph: position 0 is the origin (the earliest channel start, or the start shared
+          with the linked graph) and each channel is shifted by its start offset in samples.
+        - Offsets are resolved once when the channels, their start times or the origin change; a frame only
+          subtracts them from the position, so recordings are never resampled or copied to be aligned.
+        - Channels without a start time are placed at the origin.
+        - Positions count samples at the rate shared by the channels of the graph (sampling_frequency, the default
+          rate while the graph is empty; ValueError for channels at several rates). Graphs at different rates are
+          linked through seconds, see to_position().
+    """
+
+    def __init__(self):
+        self.origin = None
+        self.offsets = ()
+        self.length = 0
+        self.sampling_frequency = None
+        self._key = None
+
+    def resolve(self, signals, sources, sampling_frequency, origin=None):
+        starts = tuple(channel_start(source) for source in sources)
+        rates = tuple(channel_rate(source, sampling_frequency) for source in sources)
+        key = (tuple(id(samples) for samples in signals), tuple(len(samples) for samples in signals), starts, rates, sampling_frequency, origin)
+        if key != self._key:
+            if len(set(rates)) > 1:
+                raise ValueError(f"channels sampled at {sorted(set(rates))} Hz cannot share a timeline")
+            self._key = key
+            self.sampling_frequency = rates[0] if rates else sampling_frequency
+            known = [start for start in starts if start is not None]
+            self.origin = origin or (min(known) if known else None)
+            self.offsets = tuple(int(round((start - self.origin).total_seconds() * rate)) if start is not None else 0
+                                 for start, rate in zip(starts, rates))
+            self.length = max((offset + len(samples) for offset, samples in zip(self.offsets, signals)), default=0)
+        return self
+
+    @property
+    def aligned(self):
+        return any(self.offsets)
+
+    def seconds(self, position):
+        return position / self.sampling_frequency
+
+    def to_position(self, seconds):
+        return int(round(seconds * self.sampling_frequency))
@@ -0,0 +1,223 @@
+import weakref
+
+import numpy as np
+from PyQt5.QtCore import QTimer
+
+
+class ExtentIndex(object):
+    """
+    Description:
+        - Precomputed min/max of every block of a signal, built once in chunks when the signal is first plotted.
+        - The extent of any window is then read from a handful of blocks instead of the raw samples.
+    """
+    BLOCK_SIZE = 64
+
+    def __init__(self, samples, chunk_size=1 << 20):
+        n_samples = len(samples)
+        chunk_size -= chunk_size % self.BLOCK_SIZE
+        n_blocks = -(-n_samples // self.BLOCK_SIZE)
+        self.block_minimum = np.empty(n_blocks)
+        self.block_maximum = np.empty(n_blocks)
+        for start in range(0, n_samples, chunk_size):
+            values = np.asarray(samples[start: start + chunk_size], dtype=np.float64)
+            edges = np.arange(0, len(values), self.BLOCK_SIZE)
+            first_block = start // self.BLOCK_SIZE
+            self.block_minimum[first_block: first_block + len(edges)] = np.minimum.reduceat(values, edges)
+            self.block_maximum[first_block: first_block + len(edges)] = np.maximum.reduceat(values, edges)
+        self.minimum = self.block_minimum.min() if n_blocks else 0.0
+        self.maximum = self.block_maximum.max() if n_blocks else 0.0
+
+    @classmethod
+    def from_blocks(cls, block_minimum, block_maximum):
+        """
+        Description:
+            - Rebuild an index whose blocks were computed elsewhere (e.g. in a worker process).
+        """
+        index = cls.__new__(cls)
+        index.block_minimum = block_minimum
+        index.block_maximum = block_maximum
+        index.minimum = block_minimum.min() if len(block_minimum) else 0.0
+        index.maximum = block_maximum.max() if len(block_maximum) else 0.0
+        return index
+
+    def window(self, start, stop):
+        """
+        Description:
+            - (min, max) of the blocks covering samples [start, stop), may be slightly wider than the exact window.
+        """
+        # a window past the end of the signal reads its last block instead of an empty slice
+        first_block = min(max(start, 0) // self.BLOCK_SIZE, len(self.block_minimum) - 1)
+        last_block = max(first_block + 1, -(-stop // self.BLOCK_SIZE))
+        return self.block_minimum[first_block:last_block].min(), self.block_maximum[first_block:last_block].max()
+
+
+_indexes = {}
+
+
+def extent_index(samples):
+    """
+    Description:
+        - The ExtentIndex of a loaded signal, cached for as long as the signal object is alive.
+        - None while a worker builds it (see defer_extent_index).
+    """
+    if not has_extent_index(samples):
+        register_extent_index(samples, ExtentIndex(samples))
+    return _indexes[id(samples)][1]
+
+
+def has_extent_index(samples):
+    """
+    Description:
+        - Whether the index of a signal is known or being built, without building it.
+    """
+    entry = _indexes.get(id(samples))
+    return entry is not None and entry[0]() is samples
+
+
+def defer_extent_index(samples):
+    """
+    Description:
+        - Mark the index of a signal as being built elsewhere: until it is registered, the extents below use the
+          samples of the shown window instead of scanning the whole signal on the GUI thread.
+    """
+    register_extent_index(samples, None)
+
+
+def register_extent_index(samples, index):
+    """
+    Description:
+        - Seed the cache with an index that was already built, so the first frame does not scan the signal.
+    """
+    key = id(samples)
+    _indexes[key] = (weakref.ref(samples, lambda _, key=key: _indexes.pop(key, None)), index)
+
+
+def samples_extent(samples, start, stop):
+    # exact extent of a few samples, for the signals whose index is not there yet
+    values = np.asarray(samples[max(start, 0): max(stop, 0)], dtype=np.float64)
+    if not len(values) or np.isnan(values).all():
+        return np.inf, -np.inf
+    return np.nanmin(values), np.nanmax(values)
+
+
+def signals_extent(signals, start=0, stop=0, offsets=None):
+    """
+    Description:
+        - (min, max) over all the signals plotted in one graph.
+        - A signal whose index is still being built counts with its samples in [start, stop) of the graph's timeline.
+    """
+    if offsets is None:
+        offsets = (0,) * len(signals)
+    extents = []
+    for samples, offset in zip(signals, offsets):
+        index = extent_index(samples)
+        extents.append((index.minimum, index.maximum) if index is not None else samples_extent(samples, start - offset, stop - offset))
+    minimum, maximum = min(extent[0] for extent in extents), max(extent[1] for extent in extents)
+    # nothing known yet, like an empty index
+    return (minimum, maximum) if minimum <= maximum else (0.0, 0.0)
+
+
+def window_extent(signals, start, stop, offsets=None):
+    """
+    Description:
+        - (min, max) over all the signals of one graph inside samples [start, stop) of the graph's timeline,
+          each signal shifted by its offset; signals not covering the window are left out.
+    """
+    if offsets is None:
+        offsets = (0,) * len(signals)
+    extents = []
+    for samples, offset in zip(signals, offsets):
+        if start - offset < len(samples) and stop - offset > 0:
+            index = extent_index(samples)
+            extents.append(index.window(start - offset, stop - offset) if index is not None else samples_extent(samples, start - offset, stop - offset))
+    if not extents:
+        return signals_extent(signals, start, stop, offsets)
+    return min(extent[0] for extent in extents), max(extent[1] for extent in extents)
+
+
+class ViewRangeController(object):
+    """
+    Description:
+        - Single place where a graph's x/y ranges are changed.
+        - Requests are only stored; they reach the PlotWidget once per frame (flush at the end of a frame, or a
+          single-shot timer for mouse/zoom events between frames) and requests equal to the shown range are dropped.
+        - The shown range is forgotten when the view is moved from outside (mouse wheel, drag, linked view), so the
+          next request is applied even if it equals the last one.
+        - Optional windowed autoscale with hysteresis: the range only grows when the data leaves it and only shrinks
+          when the data uses less than shrink_ratio of it.
+    """
+
+    def __init__(self, widget, frame_interval=16, margin=0.1, shrink_ratio=0.5):
+        self.widget = widget
+        self.margin = margin
+        self.shrink_ratio = shrink_ratio
+        self.autoscale_range = None
+        self.applied = 0
+        self.skipped = 0
+        self._pending_x = None
+        self._pending_y = None
+        self._shown_x = None
+        self._shown_y = None
+        self._applying = False
+        widget.sigRangeChanged.connect(self._range_changed)
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(frame_interval)
+        self.timer.timeout.connect(self.flush)
+
+    def set_x_range(self, minimum, maximum):
+        self._pending_x = (minimum, maximum)
+        self._schedule()
+
+    def set_y_range(self, minimum, maximum):
+        self._pending_y = (minimum, maximum)
+        self._schedule()
+
+    def _schedule(self):
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """
+        Description:
+            - Apply the pending ranges in one view box update, skipping those that would not change anything.
+        """
+        self.timer.stop()
+        x_range = self._pending_x if self._pending_x != self._shown_x else None
+        y_range = self._pending_y if self._pending_y != self._shown_y else None
+        self._pending_x = self._pending_y = None
+        if x_range is None and y_range is None:
+            self.skipped += 1
+            return
+        self._applying = True
+        try:
+            self.widget.setRange(xRange=x_range, yRange=y_range)
+        finally:
+            self._applying = False
+        self.applied += 1
+        if x_range is not None:
+            self._shown_x = x_range
+        if y_range is not None:
+            self._shown_y = y_range
+
+    def _range_changed(self, *args):
+        if not self._applying:
+            self._shown_x = self._shown_y = None
+
+    def reset_autoscale(self):
+        self.autoscale_range = None
+
+    def autoscale_extent(self, signals, start, stop, offsets=None):
+        """
+        Description:
+            - Base y range of the window [start, stop) for autoscale, read from the extent index with hysteresis.
+        """
+        minimum, maximum = window_extent(signals, start, stop, offsets)
+        if self.autoscale_range is not None:
+            shown_minimum, shown_maximum = self.autoscale_range
+            inside = shown_minimum <= minimum and maximum <= shown_maximum
+            if inside and maximum - minimum >= self.shrink_ratio * (shown_maximum - shown_minimum):
+                return self.autoscale_range
+        padding = (maximum - minimum) * self.margin or 1e-3
+        self.autoscale_range = (minimum - padding, maximum + padding)
+        return self.autoscale_range
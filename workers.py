@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+import instrumentation
+
+
+def share_array(values):
+    """
+    Description:
+        - Copy an array into a new shared memory segment (worker side) and return its descriptor.
+        - The segment is left for the GUI process to attach and unlink.
+    """
+    values = np.ascontiguousarray(values)
+    segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[:] = values
+    descriptor = (segment.name, values.shape, values.dtype.str)
+    segment.close()
+    return descriptor
+
+
+def attach_array(descriptor):
+    """
+    Description:
+        - Map a segment made by share_array as a numpy array without copying it (GUI side).
+        - The name is unlinked right away so the memory goes back to the system once the array is released.
+    """
+    name, shape, dtype = descriptor
+    segment = shared_memory.SharedMemory(name=name)
+    segment.unlink()
+    array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    # the mapping can only be closed once the array no longer exports its buffer, so it is done on the next loop turn
+    weakref.finalize(array, QTimer.singleShot, 0, segment.close)
+    return array
+
+
+def load_csv_channel(path, column, sampling_frequency=125):
+    """
+    Description:
+        - Worker task: parse one column of a CSV recording, build its min/max block index and score its quality
+          in chunks of one second at sampling_frequency.
+        - Empty cells are read as 0 but scored as missing samples.
+    Returns:
+        - (shared array descriptor, block minimum, block maximum, quality map)
+    """
+    import pandas as pd
+    from view_range import ExtentIndex
+    from signal_quality import QualityMap, rate_chunk_size
+    cells = pd.read_csv(path, encoding='utf-8')[column]
+    missing = cells.isna().values
+    values = cells.fillna(0).values.astype(np.float64)
+    index = ExtentIndex(values)
+    quality = QualityMap(rate_chunk_size(sampling_frequency))
+    quality.extend(values, missing)
+    return share_array(values), index.block_minimum, index.block_maximum, quality
+
+
+def index_source(source):
+    """
+    Description:
+        - Worker task: build the min/max block index of a recording's channel (re-opened from its reference) and
+          keep it in the channel cache for the next restore.
+    Returns:
+        - (block minimum, block maximum)
+    """
+    from channel_cache import store_extent
+    from session import open_source
+    from view_range import ExtentIndex
+    samples, _ = open_source(source)
+    index = ExtentIndex(samples)
+    store_extent(index.block_minimum, index.block_maximum, source["hash"], source["channel"])
+    return index.block_minimum, index.block_maximum
+
+
+def score_source(source, chunk_size):
+    """
+    Description:
+        - Worker task: score the quality of a recording's channel (re-opened from its reference).
+    Returns:
+        - QualityMap
+    """
+    from session import open_source
+    from signal_quality import QualityMap
+    samples, _ = open_source(source)
+    return QualityMap.from_samples(samples, chunk_size)
+
+
+class WorkerPool(QObject):
+    """
+    Description:
+        - Pool of worker processes for the CPU heavy work, so the Qt event loop (and the plot timers) never waits on it.
+        - Results are delivered back on the GUI thread through a queued pyqt signal.
+    """
+    finished = pyqtSignal(object, object, object)
+
+    def __init__(self, max_workers=None):
+        super().__init__()
+        self.max_workers = max_workers or os.cpu_count()
+        self._executor = None
+        self._threads = None
+        self.finished.connect(self._deliver)
+
+    def submit(self, callback, function, *args, error_callback=None):
+        """
+        Description:
+            - Run function(*args) in a worker process and call callback(result) in the GUI thread when it is done.
+            - error_callback(exception) is called instead if the task raised, without one the error is logged.
+        """
+        if self._executor is None:
+            # spawn instead of fork: forking a process that already runs Qt threads is not safe
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        future = self._executor.submit(function, *args)
+        future.add_done_callback(lambda done: self.finished.emit(callback, error_callback, done))
+        return future
+
+    def submit_thread(self, callback, function, *args, error_callback=None):
+        """
+        Description:
+            - Like submit, but function(*args) runs on a background thread of this process: for I/O on data that
+              only lives here (e.g. writing a loaded signal to disk), which the worker processes cannot reach.
+        """
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(1)
+        future = self._threads.submit(function, *args)
+        future.add_done_callback(lambda done: self.finished.emit(callback, error_callback, done))
+        return future
+
+    def _deliver(self, callback, error_callback, future):
+        # tasks cancelled by shutdown() have no result, and an exception raised in a Qt slot would abort the process
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            callback(future.result())
+        elif error_callback is not None:
+            error_callback(error)
+        else:
+            instrumentation.logger.error("worker task failed", exc_info=error)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None